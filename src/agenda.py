@@ -0,0 +1,60 @@
+r"""
+agenda.py
+"""
+
+import heapq
+from typing import Iterable, Iterator
+
+from src.fact import Fact
+
+
+class Agenda:
+    """Facts waiting to be used, smallest first.
+
+    Facts are kept in a heap, ordered by their canonical key like
+    `sorted` orders them, next to a set of the facts in the agenda. A
+    fact is in the agenda at most once: pushing it again does nothing.
+    `discard` only drops a fact from the set. Its heap entry stays and is
+    skipped when it comes up.
+    """
+
+    def __init__(self, facts: Iterable[Fact] = ()) -> None:
+        self._heap: list[Fact] = []
+        self._members: set[Fact] = set()
+        for fact in facts:
+            self.push(fact)
+
+    def push(self, fact: Fact) -> bool:
+        """Add fact, return whether it was not in the agenda yet."""
+        if fact in self._members:
+            return False
+        self._members.add(fact)
+        heapq.heappush(self._heap, fact)
+        return True
+
+    def pop(self) -> Fact:
+        """Remove and return the smallest fact.
+
+        Raise IndexError if the agenda is empty.
+        """
+        while self._heap:
+            fact = heapq.heappop(self._heap)
+            if fact in self._members:
+                self._members.remove(fact)
+                return fact
+        raise IndexError("pop from an empty agenda")
+
+    def discard(self, fact: Fact) -> None:
+        self._members.discard(fact)
+        if not self._members:
+            self._heap.clear()
+
+    def __contains__(self, fact: Fact) -> bool:
+        return fact in self._members
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __iter__(self) -> Iterator[Fact]:
+        """The facts in the order they are popped."""
+        return iter(sorted(self._members))
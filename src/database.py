@@ -1,9 +1,28 @@
-from src.primitives import Point, Segment, Angle, LineKey, CongKey, Ratio, Triangle, Circle
-from src.fact import Fact
+from src.primitives import Point, Segment, Angle, LineKey, CongKey, Ratio, Triangle, Circle, SymbolTable
+from src.fact import FACT_TYPES, Fact
 from src.predicate import Predicate
+from src.triangles import TriangleClasses
+from src.unionfind import UnionFind
 
 import itertools
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from typing import Iterator, Optional
+
+# Relations that containsFact reads for each type of fact. Every
+# relation has a version, bumped whenever the relation changes.
+_FACT_RELATIONS = {
+    "coll": ("lines", ),
+    "midp": ("midp", ),
+    "para": ("para", ),
+    "perp": ("para", "perp"),
+    "eqangle": ("eqangle", ),
+    "cong": ("congs", ),
+    "eqratio": ("congs", "eqratio"),
+    "simtri": ("simtri", ),
+    "contri": ("contri", ),
+    "circle": ("circles", ),
+    "cyclic": ("circles", ),
+}
 
 
 class Database:
@@ -12,7 +31,7 @@ class Database:
                  lines: OrderedDict[LineKey, list[Point]] = None,
                  congs: OrderedDict[CongKey, list[Segment]] = None,
                  circles: list[Circle] = None,
-                 midpFacts: list[list[Point]] = None,
+                 midpFacts: list[tuple[Point, Point, Point]] = None,
                  paraFacts: list[set[LineKey]] = None,
                  perpFacts: list[set[LineKey]] = None,
                  eqangleFacts: list[set[Angle]] = None,
@@ -20,147 +39,756 @@ class Database:
                  simtriFacts: list[set[Triangle]] = None,
                  contriFacts: list[set[Triangle]] = None,
                  version: int = 0) -> None:
-        self.lines = lines or {}
-        self.congs = congs or {}
-        self.circles = circles or []
-        self.midpFacts = midpFacts or []
-        self.paraFacts = paraFacts or []
-        self.perpFacts = perpFacts or []
-        self.eqangleFacts = eqangleFacts or []
-        self.eqratioFacts = eqratioFacts or []
-        self.simtriFacts = simtriFacts or []
-        self.contriFacts = contriFacts or []
+        self.lines = {}
+        self.congs = {}
+        # simtri and contri classes, with their vertex correspondences
+        self._simtri = TriangleClasses()
+        self._contri = TriangleClasses()
+        for store, classes in [(self._simtri, simtriFacts),
+                               (self._contri, contriFacts)]:
+            for t1, *others in classes or []:
+                for t2 in others or [t1]:
+                    store.add(t1, t2)
 
         self.version = version
         self.num_temp_key = 0
+        # forms yielded by _predicate_all_forms, and repeats it skipped
+        self._forms_yielded = self._forms_skipped = 0
+
+        # Interned ids of points. The points of every line and circle
+        # are also kept as a bitmask over these ids, so that containment
+        # is `mask & q == q` and intersections are a single `&`.
+        self.symbols = SymbolTable()
+        self._line_mask: dict[LineKey, int] = {}
+
+        # containsFact answers, least recently used first, each with the
+        # versions of the relations it was read from.
+        self._versions = Counter()
+        self._contains_memo: OrderedDict[Fact, tuple] = OrderedDict()
+        self._contains_size = 4096
+        self._contains_hits = self._contains_misses = 0
+
+        # Lines are union-find classes over line keys. A merged key stays
+        # a valid name of its line: findLine resolves it to the surviving
+        # key, so stored facts never have to be rewritten. Every pair of
+        # points on a line indexes that line.
+        self._lineUF = UnionFind()
+        self._line_names = itertools.count(1)
+        self._line_seq: dict[LineKey, int] = {}
+        self._pair_line: dict[tuple[int, int], LineKey] = {}
+        # The lines through every point, and lineIntersection results by
+        # pair of line keys, negative ones included. Each line knows the
+        # cached pairs it is in, so that its entries can be dropped when
+        # it gains points or is merged away.
+        self._point_lines: dict[int, set[LineKey]] = {}
+        self._intersections: dict[tuple[LineKey, LineKey], list[Point]] = {}
+        self._line_pairs: dict[LineKey, set[tuple[LineKey, LineKey]]] = {}
+
+        # Cong classes work the same way, with every segment indexing
+        # the class it belongs to.
+        self._congUF = UnionFind()
+        self._cong_names = itertools.count(1)
+        self._cong_seq: dict[CongKey, int] = {}
+        self._segment_cong: dict[tuple[int, int], CongKey] = {}
+
+        # Para facts are direction classes: a union-find over line keys
+        # where parallel lines share a root, plus the lines of every
+        # direction that has more than one line, by root.
+        self._dirUF = UnionFind()
+        self._dir_lines: dict[LineKey, set[LineKey]] = {}
+        # Perp facts pair up directions: the directions perpendicular to
+        # each direction, all by root.
+        self._perp_dirs: dict[LineKey, set[LineKey]] = {}
+
+        for lk, points in (lines or {}).items():
+            self._set_line(lk, points)
+        for lines in paraFacts or []:
+            lk1, *others = lines
+            for lk2 in others:
+                self._add_para(lk1, lk2)
+        for lk1, lk2 in perpFacts or []:
+            self._add_perp(lk1, lk2)
+
+        # Eqangle classes are a union-find over class ids. Every stored
+        # angle maps to its class, and every line key to the angles that
+        # use it, so that a line merge re-keys only those angles.
+        self._angleUF = UnionFind()
+        self._angle_class: dict[Angle, int] = {}
+        self._angle_members: dict[int, set[Angle]] = {}
+        self._line_angles: dict[LineKey, set[Angle]] = {}
+        self._angle_ids = itertools.count()
+        for angles in eqangleFacts or []:
+            self._add_angles(*angles)
+        for ck, segments in (congs or {}).items():
+            self._set_cong(ck, segments)
+
+        # Eqratio classes work like the eqangle ones, over cong keys: a
+        # cong merge re-keys only the ratios that use the dropped key.
+        self._ratioUF = UnionFind()
+        self._ratio_class: dict[Ratio, int] = {}
+        self._ratio_members: dict[int, set[Ratio]] = {}
+        self._cong_ratios: dict[CongKey, set[Ratio]] = {}
+        self._ratio_ids = itertools.count()
+        for ratios in eqratioFacts or []:
+            self._add_ratios(*ratios)
+
+        # Circles are a union-find over circle ids. Every point indexes
+        # the circles through it, possibly by a merged id that find
+        # resolves, and every center the circles around it.
+        self._circleUF = UnionFind()
+        self._circle_ids = itertools.count()
+        self._center_names = itertools.count(1)
+        self._circle_center: dict[int, Point] = {}
+        self._circle_mask: dict[int, int] = {}
+        self._point_circles: dict[int, set[int]] = {}
+        self._center_circles: dict[Point, set[int]] = {}
+        # The points of every circle that cyclic rules have fired on.
+        self._circle_fired: dict[int, int] = {}
+        for circle in circles or []:
+            self._new_circle(circle.center, self.symbols.mask(circle.points))
+
+        # Midp facts (M, A, B) with A < B, in order, and indexed by the
+        # segment AB, by the midpoint M and by each of A and B.
+        self.midpFacts: list[tuple[Point, Point, Point]] = []
+        self._midp_by_segment: dict[tuple[Point, Point], list[Point]] = {}
+        self._midp_by_mid: dict[Point, list[tuple[Point, Point]]] = {}
+        self._midp_by_end: dict[Point, list[tuple[Point, Point, Point]]] = {}
+        for M, A, B in midpFacts or []:
+            self._add_midp(M, A, B)
 
     def version_update(self):
         self.version += 1
 
-    def _predicate_all_forms(self, fact: Fact) -> list[Predicate]:
+    def findLine(self, lk: LineKey) -> LineKey:
+        """Current key of the line named lk, which may have been merged."""
+        return self._lineUF.find(lk)
+
+    def findLines(self, lines) -> set[LineKey]:
+        """Current keys of the given lines."""
+        return {self.findLine(lk) for lk in lines}
+
+    def findAngle(self, angle: Angle) -> Angle:
+        """angle with both line keys resolved through findLine."""
+        lk1, lk2 = self.findLine(angle.lk1), self.findLine(angle.lk2)
+        if lk1 == angle.lk1 and lk2 == angle.lk2:
+            return angle
+        return Angle(lk1, lk2)
+
+    def angleClass(self, angle: Angle) -> Optional[int]:
+        """Id of the eqangle class of angle, None if it has none."""
+        cls = self._angle_class.get(self.findAngle(angle))
+        return self._angleUF.find(cls) if cls is not None else None
+
+    @property
+    def eqangleFacts(self) -> list[set[Angle]]:
+        """The eqangle classes, oldest first."""
+        return [
+            self._angle_members[cls] for cls in sorted(self._angle_members)
+        ]
+
+    def _add_angles(self, *angles: Angle) -> None:
+        """Put the given angles in one eqangle class, merging classes."""
+        angles = [self.findAngle(angle) for angle in angles]
+        classes = [
+            self._angleUF.find(self._angle_class[angle]) for angle in angles
+            if angle in self._angle_class
+        ]
+        if classes:
+            cls = min(classes)
+        else:
+            cls = next(self._angle_ids)
+            self._angleUF.add(cls)
+            self._angle_members[cls] = set()
+        for angle in angles:
+            cls = self._put_angle(cls, angle)
+
+    def _put_angle(self, cls: int, angle: Angle) -> int:
+        """Add a resolved angle to class cls and return the class root.
+
+        If the angle already has a class, that class is merged with cls.
+        """
+        self._touch("eqangle")
+        other = self._angle_class.get(angle)
+        if other is not None:
+            other = self._angleUF.find(other)
+            keep, drop = min(cls, other), max(cls, other)
+            if keep != drop:
+                self._angleUF.union(keep, drop)
+                self._angle_members[keep] |= self._angle_members.pop(drop)
+            return keep
+        self._angle_class[angle] = cls
+        self._angle_members[cls].add(angle)
+        for lk in {angle.lk1, angle.lk2}:
+            self._line_angles.setdefault(lk, set()).add(angle)
+        return cls
+
+    def _merge_line_angles(self, keep: LineKey, drop: LineKey) -> None:
+        """Line drop was merged into keep; re-key the angles using drop."""
+        self._touch("eqangle")
+        for angle in self._line_angles.pop(drop, ()):
+            cls = self._angleUF.find(self._angle_class.pop(angle))
+            self._angle_members[cls].discard(angle)
+            for lk in {angle.lk1, angle.lk2} - {drop}:
+                self._line_angles[lk].discard(angle)
+            self._put_angle(cls, angle.reindex({drop: keep}))
+
+    def _set_line(self, lk: LineKey, points) -> set[LineKey]:
+        """Store the points of line lk and refresh its indexes.
+
+        Return the other lines that share two points with lk. They are
+        the same line as lk and have to be merged into it.
+        """
+        self._touch("lines")
+        if lk not in self._lineUF:
+            self._lineUF.add(lk)
+            self._line_seq[lk] = len(self._line_seq)
+        old = self._line_mask.get(lk, 0)
+        mask = self.symbols.mask(points)
+        self.lines[lk] = sorted(points)
+        self._line_mask[lk] = mask
+        new = mask & ~old
+        if new:
+            self._forget_intersections(lk)
+        for i in self.symbols.ids(new):
+            self._point_lines.setdefault(i, set()).add(lk)
+
+        conflicts = set()
+        ids = self.symbols.ids(mask)
+        for i in self.symbols.ids(new):
+            for j in ids:
+                if i == j or (new >> j & 1 and j < i):
+                    continue
+                pair = (i, j) if i < j else (j, i)
+                prev = self._pair_line.get(pair)
+                if prev is not None:
+                    prev = self.findLine(prev)
+                    if prev != lk:
+                        conflicts.add(prev)
+                self._pair_line[pair] = lk
+        return conflicts
+
+    def _del_line(self, lk: LineKey) -> None:
+        self._touch("lines")
+        for i in self.symbols.ids(self._line_mask[lk]):
+            self._point_lines[i].discard(lk)
+        self._forget_intersections(lk)
+        del self.lines[lk]
+        del self._line_mask[lk]
+
+    def _forget_intersections(self, lk: LineKey) -> None:
+        for pair in self._line_pairs.pop(lk, ()):
+            self._intersections.pop(pair, None)
+
+    def lineMask(self, lk: LineKey) -> int:
+        """Points of line lk as a bitmask over their ids in symbols."""
+        return self._line_mask[self.findLine(lk)]
+
+    def linesThrough(self, point: Point) -> set[LineKey]:
+        """Lines through point. Do not modify the result."""
+        i = self.symbols.lookup(point)
+        return self._point_lines.get(i, set()) if i is not None else set()
+
+    def _merge_lines(self, lks: set[LineKey], points) -> None:
+        """Merge the lines lks and the given points into the oldest line.
+
+        The merged line can pick up two points of yet another line, in
+        which case that line is merged in as well.
+        """
+        while True:
+            keep, *drops = sorted(lks, key=self._line_seq.__getitem__)
+            merged = set(self.lines[keep]).union(points)
+            for drop in drops:
+                merged.update(self.lines[drop])
+                self._del_line(drop)
+                self._lineUF.union(keep, drop)
+                self._merge_line_directions(keep, drop)
+                self._merge_line_angles(keep, drop)
+
+            conflicts = self._set_line(keep, merged)
+            if not conflicts:
+                return
+            lks, points = conflicts | {keep}, ()
+
+    def findDirection(self, lk: LineKey) -> LineKey:
+        """Representative of the direction (para class) of line lk."""
+        return self._dirUF.find(self.findLine(lk))
+
+    def parallelLines(self, lk: LineKey) -> set[LineKey]:
+        """Lines known to be parallel to lk, lk itself included.
+
+        Empty if no para fact mentions lk. Do not modify the result.
+        """
+        return self._dir_lines.get(self.findDirection(lk), set())
+
+    def isPara(self, lk1: LineKey, lk2: LineKey) -> bool:
+        d1 = self.findDirection(lk1)
+        return d1 == self.findDirection(lk2) and d1 in self._dir_lines
+
+    def perpendicularLines(self, lk: LineKey) -> set[LineKey]:
+        """Lines known to be perpendicular to lk."""
+        lines = set()
+        for d in self._perp_dirs.get(self.findDirection(lk), ()):
+            lines |= self._direction_lines(d)
+        return lines
+
+    def isPerp(self, lk1: LineKey, lk2: LineKey) -> bool:
+        return self.findDirection(lk2) in self._perp_dirs.get(
+            self.findDirection(lk1), ())
+
+    @property
+    def paraFacts(self) -> list[set[LineKey]]:
+        """The para classes, one set of line keys per direction."""
+        return list(self._dir_lines.values())
+
+    @property
+    def perpFacts(self) -> list[set[LineKey]]:
+        """Every pair of perpendicular lines, as 2-sets of line keys."""
+        pairs = []
+        for d1, others in self._perp_dirs.items():
+            for d2 in others:
+                if d2 < d1:
+                    continue
+                for lk1 in self._direction_lines(d1):
+                    for lk2 in self._direction_lines(d2):
+                        pairs.append({lk1, lk2})
+        return pairs
+
+    def _direction_lines(self, d: LineKey) -> set[LineKey]:
+        """Lines of the direction with root d."""
+        return self._dir_lines.get(d) or {self.findLine(d)}
+
+    def _add_para(self, lk1: LineKey, lk2: LineKey) -> None:
+        """Merge the directions of lines lk1 and lk2."""
+        self._touch("para")
+        d1, d2 = self.findDirection(lk1), self.findDirection(lk2)
+        lines = self._dir_lines.pop(d1, {self.findLine(lk1)})
+        if d2 != d1:
+            lines |= self._dir_lines.pop(d2, {self.findLine(lk2)})
+        root = self._dirUF.union(d1, d2)
+        self._dir_lines[root] = lines
+        self._merge_perp_dirs(d1, d2, root)
+
+    def _add_perp(self, lk1: LineKey, lk2: LineKey) -> None:
+        self._touch("perp")
+        d1, d2 = self.findDirection(lk1), self.findDirection(lk2)
+        self._perp_dirs.setdefault(d1, set()).add(d2)
+        self._perp_dirs.setdefault(d2, set()).add(d1)
+
+    def _merge_perp_dirs(self, d1: LineKey, d2: LineKey,
+                         root: LineKey) -> None:
+        """Directions d1 and d2 merged into root; move their perp pairs."""
+        self._touch("perp")
+        if d1 == d2:
+            return
+        others = self._perp_dirs.pop(d1, set())
+        others |= self._perp_dirs.pop(d2, set())
+        others -= {d1, d2}
+        for d in others:
+            adjacent = self._perp_dirs[d]
+            adjacent -= {d1, d2}
+            adjacent.add(root)
+        if others:
+            self._perp_dirs[root] = others
+
+    def _merge_line_directions(self, keep: LineKey, drop: LineKey) -> None:
+        """Line drop was merged into keep, so their directions merge too."""
+        self._touch("para")
+        d1, d2 = self._dirUF.find(keep), self._dirUF.find(drop)
+        lines = self._dir_lines.pop(d1, set())
+        if d2 != d1:
+            lines |= self._dir_lines.pop(d2, set())
+        root = self._dirUF.union(d1, d2)
+        if lines:
+            lines.discard(drop)
+            lines.add(keep)
+            self._dir_lines[root] = lines
+        self._merge_perp_dirs(d1, d2, root)
+
+    def findCong(self, ck: CongKey) -> CongKey:
+        """Current key of the cong class ck, which may have been merged."""
+        return self._congUF.find(ck)
+
+    def findSegment(self, segment: Segment) -> Optional[CongKey]:
+        """Key of the cong class holding segment, None if it has none."""
+        ids = self._segment_ids(segment)
+        ck = self._segment_cong.get(ids) if ids is not None else None
+        return self.findCong(ck) if ck is not None else None
+
+    def findRatio(self, ratio: Ratio) -> Ratio:
+        """ratio with both cong keys resolved through findCong."""
+        c1, c2 = self.findCong(ratio.c1), self.findCong(ratio.c2)
+        if c1 == ratio.c1 and c2 == ratio.c2:
+            return ratio
+        return Ratio(c1, c2)
+
+    def findRatios(self, ratios) -> set[Ratio]:
+        """The given ratios with their cong keys resolved."""
+        return {self.findRatio(ratio) for ratio in ratios}
+
+    def ratioClass(self, ratio: Ratio) -> Optional[int]:
+        """Id of the eqratio class of ratio, None if it has none."""
+        cls = self._ratio_class.get(self.findRatio(ratio))
+        return self._ratioUF.find(cls) if cls is not None else None
+
+    def equalRatios(self, ratio: Ratio) -> set[Ratio]:
+        """Ratios known to be equal to ratio, ratio itself included.
+
+        Empty if no eqratio fact mentions ratio. Do not modify the result.
+        """
+        cls = self.ratioClass(ratio)
+        return self._ratio_members[cls] if cls is not None else set()
+
+    @property
+    def simtriFacts(self) -> list[set[Triangle]]:
+        """The simtri classes, with corresponding vertices in line."""
+        return self._simtri.classes()
+
+    @property
+    def contriFacts(self) -> list[set[Triangle]]:
+        """The contri classes, with corresponding vertices in line."""
+        return self._contri.classes()
+
+    @property
+    def eqratioFacts(self) -> list[set[Ratio]]:
+        """The eqratio classes, oldest first."""
+        return [
+            self._ratio_members[cls] for cls in sorted(self._ratio_members)
+        ]
+
+    def _add_ratios(self, *ratios: Ratio) -> None:
+        """Put the given ratios in one eqratio class, merging classes."""
+        ratios = [self.findRatio(ratio) for ratio in ratios]
+        classes = [
+            self._ratioUF.find(self._ratio_class[ratio]) for ratio in ratios
+            if ratio in self._ratio_class
+        ]
+        if classes:
+            cls = min(classes)
+        else:
+            cls = next(self._ratio_ids)
+            self._ratioUF.add(cls)
+            self._ratio_members[cls] = set()
+        for ratio in ratios:
+            cls = self._put_ratio(cls, ratio)
+
+    def _put_ratio(self, cls: int, ratio: Ratio) -> int:
+        """Add a resolved ratio to class cls and return the class root.
+
+        If the ratio already has a class, that class is merged with cls.
+        """
+        self._touch("eqratio")
+        other = self._ratio_class.get(ratio)
+        if other is not None:
+            other = self._ratioUF.find(other)
+            keep, drop = min(cls, other), max(cls, other)
+            if keep != drop:
+                self._ratioUF.union(keep, drop)
+                self._ratio_members[keep] |= self._ratio_members.pop(drop)
+            return keep
+        self._ratio_class[ratio] = cls
+        self._ratio_members[cls].add(ratio)
+        for ck in {ratio.c1, ratio.c2}:
+            self._cong_ratios.setdefault(ck, set()).add(ratio)
+        return cls
+
+    def _merge_cong_ratios(self, keep: CongKey, drop: CongKey) -> None:
+        """Cong drop was merged into keep; re-key the ratios using drop.
+
+        A class whose ratios all collapse into one is no longer a fact
+        and is removed.
+        """
+        self._touch("eqratio")
+        touched = set()
+        for ratio in self._cong_ratios.pop(drop, ()):
+            cls = self._ratioUF.find(self._ratio_class.pop(ratio))
+            self._ratio_members[cls].discard(ratio)
+            for ck in {ratio.c1, ratio.c2} - {drop}:
+                self._cong_ratios[ck].discard(ratio)
+            touched.add(self._put_ratio(cls, ratio.reindex({drop: keep})))
+
+        for cls in {self._ratioUF.find(cls) for cls in touched}:
+            if len(self._ratio_members[cls]) < 2:
+                for ratio in self._ratio_members.pop(cls):
+                    del self._ratio_class[ratio]
+                    for ck in {ratio.c1, ratio.c2}:
+                        self._cong_ratios[ck].discard(ratio)
+
+    def _set_cong(self, ck: CongKey, segments) -> None:
+        """Store the segments of cong class ck and index them."""
+        self._touch("congs")
+        if ck not in self._congUF:
+            self._congUF.add(ck)
+            self._cong_seq[ck] = len(self._cong_seq)
+        self.congs[ck] = sorted(segments)
+        for s in segments:
+            self._segment_cong[self.symbols.pair(s.p1, s.p2)] = ck
+
+    def _del_cong(self, ck: CongKey) -> None:
+        self._touch("congs")
+        del self.congs[ck]
+
+    def _merge_congs(self, cks: set[CongKey], segments) -> None:
+        """Merge the cong classes cks and the segments into the oldest."""
+        keep, *drops = sorted(cks, key=self._cong_seq.__getitem__)
+        merged = set(self.congs[keep]).union(segments)
+        for drop in drops:
+            merged.update(self.congs[drop])
+            self._del_cong(drop)
+            self._congUF.union(keep, drop)
+            self._merge_cong_ratios(keep, drop)
+        self._set_cong(keep, merged)
+
+    @property
+    def circles(self) -> list[Circle]:
+        """The circles, oldest first."""
+        return [
+            Circle(self._circle_center[c],
+                   {self.symbols.symbol(i) for i in self.symbols.ids(mask)})
+            for c, mask in self._circle_mask.items()
+        ]
+
+    def circleMasks(self) -> list[int]:
+        """Points of every circle as a bitmask, in circles order."""
+        return list(self._circle_mask.values())
+
+    def _circles_through(self, mask: int) -> set[int]:
+        """Circles through any of the points in mask."""
+        return {
+            self._circleUF.find(c)
+            for i in self.symbols.ids(mask)
+            for c in self._point_circles.get(i, ())
+        }
+
+    def newConcyclicQuadruples(
+            self, points: list[Point]) -> list[tuple[Point, ...]]:
+        """Sets of four points concyclic with the given points, on the
+        circle a cyclic fact on them is merged into, that no earlier call
+        returned for that circle.
+
+        Each set is returned once, in point id order.
+        """
+        q = self.symbols.mask(points)
+        circles = {
+            c for c in self._circles_through(q)
+            if (self._circle_mask[c] & q).bit_count() >= 3
+        }
+        mask, fired = q, []
+        for c in circles:
+            mask |= self._circle_mask[c]
+            fired.append(self._circle_fired.get(c, 0))
+        if circles:
+            self._circle_fired[min(circles)] = mask
+
+        quadruples = []
+        for ids in itertools.combinations(self.symbols.ids(mask), 4):
+            m = sum(1 << i for i in ids)
+            if not any(m & f == m for f in fired):
+                quadruples.append(tuple(self.symbols.symbol(i) for i in ids))
+        return quadruples
+
+    def _new_circle(self, center: Point, mask: int) -> None:
+        self._touch("circles")
+        c = next(self._circle_ids)
+        self._circleUF.add(c)
+        self._circle_center[c] = center
+        self._circle_mask[c] = 0
+        self._center_circles.setdefault(center, set()).add(c)
+        self._add_circle_points(c, mask)
+
+    def _add_circle_points(self, c: int, mask: int) -> None:
+        self._touch("circles")
+        new = mask & ~self._circle_mask[c]
+        self._circle_mask[c] |= new
+        for i in self.symbols.ids(new):
+            self._point_circles.setdefault(i, set()).add(c)
+
+    def _merge_circles(self, circles: set[int], mask: int) -> None:
+        """Merge the circles and the points in mask into the oldest circle.
+
+        Like a line, the merged circle can pick up three points of yet
+        another circle, or a point of one with the same center, in which
+        case that circle is merged in as well.
+        """
+        self._touch("circles")
+        while True:
+            keep, *drops = sorted(circles)
+            for drop in drops:
+                self._circleUF.union(keep, drop)
+                center = self._circle_center.pop(drop)
+                self._center_circles[center].discard(drop)
+                # the points of drop already index it, and so keep
+                self._circle_mask[keep] |= self._circle_mask.pop(drop)
+                self._circle_fired.pop(drop, None)
+            self._add_circle_points(keep, mask)
+
+            center, mask = self._circle_center[keep], self._circle_mask[keep]
+            circles = {
+                c for c in self._circles_through(mask)
+                if c != keep and ((self._circle_mask[c] & mask).bit_count()
+                                  >= 3 or self._circle_center[c] == center)
+            }
+            if not circles:
+                return
+            circles, mask = circles | {keep}, 0
+
+    def midpoints(self, A: Point, B: Point) -> list[Point]:
+        """Midpoints of segment AB. Do not modify the result."""
+        return self._midp_by_segment.get(tuple(sorted([A, B])), [])
+
+    def bisectedSegments(self, M: Point) -> list[tuple[Point, Point]]:
+        """Segments (A, B), A < B, with midpoint M."""
+        return self._midp_by_mid.get(M, [])
+
+    def midpFactsAt(self, A: Point) -> list[tuple[Point, Point, Point]]:
+        """Midp facts (M, A, B) with an endpoint at A."""
+        return self._midp_by_end.get(A, [])
+
+    def _add_midp(self, M: Point, A: Point, B: Point) -> None:
+        self._touch("midp")
+        A, B = sorted([A, B])
+        mids = self._midp_by_segment.setdefault((A, B), [])
+        if M in mids:
+            return
+        mids.append(M)
+        self._midp_by_mid.setdefault(M, []).append((A, B))
+        for P in {A, B}:
+            self._midp_by_end.setdefault(P, []).append((M, A, B))
+        self.midpFacts.append((M, A, B))
+
+    def _segment_ids(self,
+                     segment: Segment) -> Optional[tuple[int, int]]:
+        """Id pair of a segment, or None if an endpoint is unknown."""
+        i = self.symbols.lookup(segment.p1)
+        j = self.symbols.lookup(segment.p2)
+        if i is None or j is None:
+            return None
+        return (i, j) if i < j else (j, i)
+
+    def _predicate_all_forms(self, fact: Fact) -> Iterator[Predicate]:
+        """Yield the predicate forms of fact, each distinct form once.
+
+        Forms are generated on demand. predicateFormsInfo counts the
+        forms yielded and the repeated ones skipped.
+        """
+        if fact.type not in FACT_TYPES:
+            raise ValueError(f"{fact.type} not supported")
+        seen = set()
+        for predicate in self._fact_forms(fact):
+            if predicate in seen:
+                self._forms_skipped += 1
+                continue
+            seen.add(predicate)
+            self._forms_yielded += 1
+            yield predicate
+
+    def predicateFormsInfo(self) -> dict[str, int]:
+        """Forms yielded and repeated forms skipped so far."""
+        return {
+            "yielded": self._forms_yielded,
+            "skipped": self._forms_skipped,
+        }
+
+    def _fact_forms(self, fact: Fact) -> Iterator[Predicate]:
         if fact.type == "coll":
             # TADD other facts that are changed because of this
             # IF the coll fact is contained in the database, NOTHING to do
             # IF the coll fact gives a new line or adds new points on existing line,
             #   FIND ALL the eqangle, perp, para facts contained this line
             line = self.matchLine(fact.objects[:2])
-            predicates = []
             # EQANGLE
             for e in self.eqangleFacts:
                 angles = [a for a in e if line in [a.lk1, a.lk2]]
                 other_angles = [a for a in e if a not in angles]
                 for angle in angles:
                     for other_angle in other_angles:
-                        predicates += [
-                            Predicate("eqangle",
-                                      lines=[
-                                          angle.lk1, angle.lk2,
-                                          other_angle.lk1, other_angle.lk2
-                                      ])
-                        ]
+                        yield Predicate("eqangle",
+                                        lines=[
+                                            angle.lk1, angle.lk2,
+                                            other_angle.lk1, other_angle.lk2
+                                        ])
             # PARA
-            for para in self.paraFacts:
-                if line not in para:
-                    continue
-                other_lines = [l for l in para if l != line]
-                for other_line in other_lines:
-                    predicates += self._predicate_all_forms(
-                        Fact("para", [line, other_line]))
+            other_lines = [l for l in self.parallelLines(line) if l != line]
+            for other_line in other_lines:
+                yield from self._fact_forms(
+                    Fact("para", [line, other_line]))
             # PERP
-            for perp in self.perpFacts:
-                if line in perp:
-                    predicates += self._predicate_all_forms(Fact("perp", perp))
-            return predicates
+            for other_line in self.perpendicularLines(line):
+                yield from self._fact_forms(
+                    Fact("perp", [line, other_line]))
+            return
 
         if fact.type == "para":
-            lk1, lk2 = fact.objects
-            predicates = []
-            for (A, B) in itertools.permutations(self.lines[lk1], 2):
-                for (C, D) in itertools.permutations(self.lines[lk2], 2):
-                    predicates.append(Predicate("para", [A, B, C, D]))
-                    # predicates.append(Predicate("para", [C, D, A, B]))
-            for lines in self.paraFacts:
-                if lk1 not in lines and lk2 not in lines:
+            # Point forms first: their rules may add the lines that the
+            # rules of the line forms then go through.
+            lk1, lk2 = map(self.findLine, fact.objects)
+            pairs = [(lk1, lk2)]
+            lines = self.parallelLines(lk1) | self.parallelLines(lk2)
+            for lk3 in sorted(lines):
+                if lk3 in [lk1, lk2]:
                     continue
-                for lk3 in lines:
-                    if lk3 in [lk1, lk2]:
-                        continue
-                    for l in [lk1, lk2]:
-                        for (A, B) in itertools.permutations(self.lines[l], 2):
-                            for (C, D) in itertools.permutations(
-                                    self.lines[lk3], 2):
-                                predicates.append(
-                                    Predicate("para", [A, B, C, D]))
-                                predicates.append(
-                                    Predicate("para", [C, D, A, B]))
-            return predicates
+                for l in [lk1, lk2]:
+                    pairs += [(l, lk3), (lk3, l)]
+            for l1, l2 in pairs:
+                for (A, B) in itertools.permutations(self.lines[l1], 2):
+                    for (C, D) in itertools.permutations(self.lines[l2], 2):
+                        yield Predicate("para", [A, B, C, D])
+            for l1, l2 in pairs:
+                yield Predicate("para", lines=[l1, l2])
+            return
         if fact.type == "perp":
-            lk1, lk2 = fact.objects
-            predicates = []
-            for (A, B) in itertools.permutations(self.lines[lk1], 2):
-                for (C, D) in itertools.permutations(self.lines[lk2], 2):
-                    predicates.append(
-                        Predicate("perp", [A, B, C, D], [lk1, lk2]))
-                    predicates.append(
-                        Predicate("perp", [C, D, A, B], [lk2, lk1]))
-            return predicates
+            # Point forms are only needed as perp(A,B,B,C) at the foot B
+            lk1, lk2 = map(self.findLine, fact.objects)
+            for B in self.lineIntersection(lk1, lk2):
+                for A in self.lines[lk1]:
+                    for C in self.lines[lk2]:
+                        if B not in [A, C]:
+                            yield Predicate("perp", [A, B, B, C])
+                            yield Predicate("perp", [C, B, B, A])
+            yield Predicate("perp", lines=[lk1, lk2])
+            yield Predicate("perp", lines=[lk2, lk1])
+            return
         if fact.type == "midp":
             M, A, B = fact.objects
-            return [Predicate("midp", [M, A, B]), Predicate("midp", [M, B, A])]
+            yield Predicate("midp", [M, A, B])
+            yield Predicate("midp", [M, B, A])
         if fact.type == "cong":
             s1, s2 = fact.objects
             A, B, C, D = s1.p1, s1.p2, s2.p1, s2.p2
-            return [
+            yield from [
                 Predicate("cong", [A, B, C, D]),
                 Predicate("cong", [A, B, D, C]),
                 Predicate("cong", [B, A, C, D]),
                 Predicate("cong", [B, A, D, C]),
             ]
         if fact.type == "eqangle":
-            lk1, lk2, lk3, lk4 = fact.objects
+            lk1, lk2, lk3, lk4 = map(self.findLine, fact.objects)
             # Give a test generating lines directly instead of to points.
-            predicates = []
             for lines in [[lk1, lk2, lk3, lk4], [lk2, lk1, lk4, lk3],
                           [lk1, lk3, lk2, lk4], [lk3, lk1, lk4, lk2]]:
                 l1, l2, l3, l4 = lines
                 if l1 != l2 and l3 != l4:
-                    predicates.append(Predicate("eqangle", lines=list(lines)))
-            # print("DATABASE::_PREDICATE_ALL_FORM::PREDICATES", predicates)
-            return predicates
+                    yield Predicate("eqangle", lines=list(lines))
+            return
 
         if fact.type == "eqratio":
-            s1, s2, s3, s4 = fact.objects
-            ck1 = self.matchCong([s1.p1, s1.p2])
-            ck2 = self.matchCong([s2.p1, s2.p2])
-            ck3 = self.matchCong([s3.p1, s3.p2])
-            ck4 = self.matchCong([s4.p1, s4.p2])
-            ratio_pairs = [
-                [Ratio(ck1, ck2), Ratio(ck3, ck4)],
-                [Ratio(ck2, ck1), Ratio(ck4, ck3)],
-                [Ratio(ck1, ck3), Ratio(ck2, ck4)],
-                [Ratio(ck3, ck1), Ratio(ck4, ck2)],
+            # One form per ratio ordering, each cong class standing in
+            # by its first segment. Rules enumerate the class members.
+            s1, s2, s3, s4 = [
+                self.congs[self.matchCong([s.p1, s.p2])][0]
+                for s in fact.objects
             ]
-            predicates = []
-            for (r1, r2) in ratio_pairs:
-                s1, s2 = self.congs[r1.c1], self.congs[r1.c2]
-                s3, s4 = self.congs[r2.c1], self.congs[r2.c2]
-                for sAB in s1:
-                    for sCD in s2:
-                        for sPQ in s3:
-                            for sUV in s4:
-                                A, B = sAB.p1, sAB.p2
-                                C, D = sCD.p1, sCD.p2
-                                P, Q = sPQ.p1, sPQ.p2
-                                U, V = sUV.p1, sUV.p2
-                                predicates.append(
-                                    Predicate("eqratio",
-                                              [A, B, C, D, P, Q, U, V]))
-            return predicates
+            for (sAB, sCD, sPQ, sUV) in [(s1, s2, s3, s4), (s2, s1, s4, s3),
+                                         (s1, s3, s2, s4), (s3, s1, s4, s2)]:
+                yield Predicate("eqratio", [
+                    sAB.p1, sAB.p2, sCD.p1, sCD.p2, sPQ.p1, sPQ.p2, sUV.p1,
+                    sUV.p2
+                ])
+            return
         if fact.type == "simtri":
             t1, t2 = fact.objects
             A, B, C = t1.p1, t1.p2, t1.p3
             P, Q, R = t2.p1, t2.p2, t2.p3
-            return [
+            yield from [
                 Predicate("simtri", [A, B, C, P, Q, R]),
                 Predicate("simtri", [A, C, B, P, R, Q]),
                 Predicate("simtri", [B, A, C, Q, P, R]),
@@ -172,7 +800,7 @@ class Database:
             t1, t2 = fact.objects
             A, B, C = t1.p1, t1.p2, t1.p3
             P, Q, R = t2.p1, t2.p2, t2.p3
-            return [
+            yield from [
                 Predicate("contri", [A, B, C, P, Q, R]),
                 Predicate("contri", [A, C, B, P, R, Q]),
                 Predicate("contri", [B, A, C, Q, P, R]),
@@ -181,15 +809,10 @@ class Database:
                 Predicate("contri", [C, B, A, R, Q, P])
             ]
         if fact.type == "circle":
-            return [Predicate("circle", fact.objects)]
+            yield Predicate("circle", fact.objects)
         if fact.type == "cyclic":
-            A, B, C, D = fact.objects
-            predicates = []
-            for [AA, BB, CC, DD] in itertools.permutations([A, B, C, D], 4):
-                predicates.append(Predicate("cyclic", [AA, BB, CC, DD]))
-            return predicates
-
-        raise ValueError(f"{fact.type} not supported")
+            # Rules go through the whole circle from this one form
+            yield Predicate("cyclic", fact.objects)
 
     def _predicate_to_fact(self, predicate: Predicate) -> Fact:
         if predicate.type == "coll":
@@ -294,215 +917,107 @@ class Database:
 
     def circleHandler(self, fact: Fact):
         """Add Fact(circle, [O, A, B, C])
-        """
-        center, points = fact.objects[0], fact.objects[1:]
-        found = False
-        i = 0
-        while i < len(self.circles) and not found:
-            circle = self.circles[i]
-            if circle.center != center:
-                continue
-            inCount = sum(p in circle.points for p in points)
-            if inCount >= 1:
-                found = True
-                self.circles[i] = Circle(center,
-                                         circle.points.union(set(points)))
 
-        if not found:
-            self.circles.append(Circle(center, set(points)))
+        Merged with every circle around O through one of A, B, C.
+        """
+        center = fact.objects[0]
+        q = self.symbols.mask(fact.objects[1:])
+        overlapsMap = {
+            c for c in self._circles_through(q)
+            if self._circle_center[c] == center
+        }
+        if overlapsMap:
+            self._merge_circles(overlapsMap, q)
+        else:
+            self._new_circle(center, q)
 
     def cyclicHandler(self, fact: Fact):
         """Add Fact(cyclic, [P1, P2, P3, P4])
-        """
-
-        def overlaps(set1: set, set2: set) -> bool:
-            return len(set1.intersection(set2)) >= 3
-
-        overlapsMap = [
-            i for i in range(len(self.circles))
-            if overlaps(self.circles[i].points, fact.objects)
-        ]
-
-        if len(overlapsMap) == 0:
-            self.circles.append(Circle(self.newCenterName, set(fact.objects)))
-
-        elif len(overlapsMap) == 1:
-            pos = overlapsMap[0]
-            circle = self.circles[pos]
-            self.circles[pos] = Circle(circle.center,
-                                       circle.points.union(set(fact.objects)))
-        elif len(overlapsMap) >= 2:
-            keep = overlapsMap[0]
-            drops = overlapsMap[1:]
-            circlePoints = set(fact.objects)
-            for drop in drops:
-                circlePoints = circlePoints.union(self.circles[drop].points)
 
-            circleKeep = self.circles[keep]
-            self.circles[keep] = Circle(circleKeep.center,
-                                        circleKeep.points.union(circlePoints))
-            for drop in drops:
-                del self.circles[drop]
+        Merged with every circle through three of the points.
+        """
+        q = self.symbols.mask(fact.objects)
+        overlapsMap = {
+            c for c in self._circles_through(q)
+            if (self._circle_mask[c] & q).bit_count() >= 3
+        }
+        if overlapsMap:
+            self._merge_circles(overlapsMap, q)
+        else:
+            self._new_circle(self.newCenterName, q)
 
     def eqangleHandler(self, fact: Fact):
         """Add Fact(eqangle, [LK1, LK2, LK3, LK4])
+
+        Of the four equivalent forms of the fact, the one that meets the
+        oldest existing class is stored, merging every class it meets.
         """
-        lk1, lk2, lk3, lk4 = fact.objects
-        found = False
-        i = 0
+        lk1, lk2, lk3, lk4 = map(self.findLine, fact.objects)
+        angle_pairs = [
+            [Angle(lk1, lk2), Angle(lk3, lk4)],
+            [Angle(lk2, lk1), Angle(lk4, lk3)],
+            [Angle(lk1, lk3), Angle(lk2, lk4)],
+            [Angle(lk3, lk1), Angle(lk4, lk2)],
+        ]
 
         # find the order
-        while i < len(self.eqangleFacts) and not found:
-            factsi = self.eqangleFacts[i]
-            angle_pairs = [
-                [Angle(lk1, lk2), Angle(lk3, lk4)],
-                [Angle(lk2, lk1), Angle(lk4, lk3)],
-                [Angle(lk1, lk3), Angle(lk2, lk4)],
-                [Angle(lk3, lk1), Angle(lk4, lk2)],
-            ]
-            for (a1, a2) in angle_pairs:
-                if a1.lk1 != a1.lk2 and a2.lk1 != a2.lk2:
-                    if a1 in factsi or a2 in factsi:
-                        angle = (a1, a2)
-                        found = True
-                        break
-            i += 1
-
-        if not found:
-            self.eqangleFacts.append({Angle(lk1, lk2), Angle(lk3, lk4)})
-        else:
-            # find the overlap
-            a1, a2 = angle
-            overlapsMap = [
-                i for i in range(len(self.eqangleFacts))
-                if a1 in self.eqangleFacts[i] or a2 in self.eqangleFacts[i]
-            ]
-            if len(overlapsMap) == 1:
-                pos = overlapsMap[0]
-                self.eqangleFacts[pos] = self.eqangleFacts[pos].union({a1, a2})
-            elif len(overlapsMap) >= 2:
-                keep, drops = overlapsMap[0], overlapsMap[1:]
-                angles = self.eqangleFacts[keep].union({a1, a2})
-                for drop in drops:
-                    angles = angles.union(self.eqangleFacts[drop])
-
-                self.eqangleFacts[keep] = angles
-                self.eqangleFacts = [
-                    self.eqangleFacts[i] for i in range(len(self.eqangleFacts))
-                    if i not in drops
-                ]
+        best, angles = None, angle_pairs[0]
+        for (a1, a2) in angle_pairs:
+            if a1.lk1 == a1.lk2 or a2.lk1 == a2.lk2:
+                continue
+            for cls in (self.angleClass(a1), self.angleClass(a2)):
+                if cls is not None and (best is None or cls < best):
+                    best, angles = cls, (a1, a2)
+
+        self._add_angles(*angles)
 
     def eqratioHandler(self, fact: Fact):
         """Add Fact(eqratio, [S1, S2, S3, S4])
+
+        Of the four equivalent forms of the fact, the one that meets the
+        oldest existing class is stored, merging every class it meets.
         """
         s1, s2, s3, s4 = fact.objects
         ck1 = self.matchCong([s1.p1, s1.p2])
         ck2 = self.matchCong([s2.p1, s2.p2])
         ck3 = self.matchCong([s3.p1, s3.p2])
         ck4 = self.matchCong([s4.p1, s4.p2])
+        if ck1 == ck3 and ck2 == ck4:
+            return
+
+        ratio_pairs = [
+            [Ratio(ck1, ck2), Ratio(ck3, ck4)],
+            [Ratio(ck2, ck1), Ratio(ck4, ck3)],
+            [Ratio(ck1, ck3), Ratio(ck2, ck4)],
+            [Ratio(ck3, ck1), Ratio(ck4, ck2)],
+        ]
 
-        found = ck1 == ck3 and ck2 == ck4
-        # found = False
-        i = 0
-        while i < len(self.eqratioFacts) and not found:
-            factsi = self.eqratioFacts[i]
-            ratio_pairs = [
-                [Ratio(ck1, ck2), Ratio(ck3, ck4)],
-                [Ratio(ck2, ck1), Ratio(ck4, ck3)],
-                [Ratio(ck1, ck3), Ratio(ck2, ck4)],
-                [Ratio(ck3, ck1), Ratio(ck4, ck2)],
-            ]
-            for (r1, r2) in ratio_pairs:
-                if r1 in factsi or r2 in factsi:
-                    self.eqratioFacts[i] = factsi.union({r1, r2})
-                    found = True
-                    break
-            i += 1
+        # find the order
+        best, ratios = None, ratio_pairs[0]
+        for (r1, r2) in ratio_pairs:
+            for cls in (self.ratioClass(r1), self.ratioClass(r2)):
+                if cls is not None and (best is None or cls < best):
+                    best, ratios = cls, (r1, r2)
 
-        if not found:
-            self.eqratioFacts.append({Ratio(ck1, ck2), Ratio(ck3, ck4)})
+        self._add_ratios(*ratios)
 
     def simtriHandler(self, fact: Fact):
         """Add Fact(simtri, [T1, T2])
 
         Be aware that the order of triangle vertices matters.
         """
+        self._touch("simtri")
         t1, t2 = fact.objects
-        overlapsMap = [
-            i for i in range(len(self.simtriFacts))
-            if t1 in self.simtriFacts[i] or t2 in self.simtriFacts[i]
-        ]
-
-        if len(overlapsMap) == 0:
-            self.simtriFacts.append({t1, t2})
-        elif len(overlapsMap) == 1:
-            pos = overlapsMap[0]
-            tris = self.simtriFacts[pos]
-            t: Triangle = t1 if t1 in tris else t2
-            tt: Triangle = [tri for tri in tris if tri == t][0]
-            # get the order of vertices
-            ords = [[t.p1, t.p2, t.p3].index(v) for v in [tt.p1, tt.p2, tt.p3]]
-            v1s = [t1.p1, t1.p2, t1.p3]
-            v2s = [t2.p1, t2.p2, t2.p3]
-            t1p = Triangle(*[v1s[o] for o in ords])
-            t2p = Triangle(*[v2s[o] for o in ords])
-            self.simtriFacts[pos] = tris.union({t1p, t2p})
-        elif len(overlapsMap) >= 2:
-            keep, drop = overlapsMap
-            tris = self.simtriFacts[keep]
-            t: Triangle = t1 if t1 in tris else t2
-            tt: Triangle = [tri for tri in tris if tri == t]
-            # get the order of vertices
-            ords = [[t.p1, t.p2, t.p3].index(v) for v in [tt.p1, tt.p2, tt.p3]]
-            v1s = [t1.p1, t1.p2, t1.p3]
-            v2s = [t2.p1, t2.p2, t2.p3]
-            t1p = Triangle([v1s[o] for o in ords])
-            t2p = Triangle([v2s[o] for o in ords])
-
-            self.simtriFacts[keep] = self.simtriFacts[keep].union(
-                self.simtriFacts[drop].union({t1p, t2p}))
-            del self.simtriFacts[drop]
+        self._simtri.add(t1, t2)
 
     def contriHandler(self, fact: Fact):
         """Add Fact(contri, [T1, T2])
 
         Be aware that the order of triangle vertices matters.
         """
+        self._touch("contri")
         t1, t2 = fact.objects
-        overlapsMap = [
-            i for i in range(len(self.contriFacts))
-            if t1 in self.contriFacts[i] or t2 in self.contriFacts[i]
-        ]
-
-        if len(overlapsMap) == 0:
-            self.contriFacts.append({t1, t2})
-        elif len(overlapsMap) == 1:
-            pos = overlapsMap[0]
-            tris = self.contriFacts[pos]
-            t: Triangle = t1 if t1 in tris else t2
-            tt: Triangle = [tri for tri in tris if tri == t][0]
-            # get the order of vertices
-            ords = [[t.p1, t.p2, t.p3].index(v) for v in [tt.p1, tt.p2, tt.p3]]
-            v1s = [t1.p1, t1.p2, t1.p3]
-            v2s = [t2.p1, t2.p2, t2.p3]
-            t1p = Triangle(*[v1s[o] for o in ords])
-            t2p = Triangle(*[v2s[o] for o in ords])
-            self.contriFacts[pos] = tris.union({t1p, t2p})
-        elif len(overlapsMap) == 2:
-            keep, drop = overlapsMap
-            tris = self.contriFacts[keep]
-            t: Triangle = t1 if t1 in tris else t2
-            tt: Triangle = [tri for tri in tris if tri == t][0]
-            # get the order of vertices
-            ords = [[t.p1, t.p2, t.p3].index(v) for v in [tt.p1, tt.p2, tt.p3]]
-            v1s = [t1.p1, t1.p2, t1.p3]
-            v2s = [t2.p1, t2.p2, t2.p3]
-            t1p = Triangle(*[v1s[o] for o in ords])
-            t2p = Triangle(*[v2s[o] for o in ords])
-
-            self.contriFacts[keep] = self.contriFacts[keep].union(
-                self.contriFacts[drop].union({t1p, t2p}))
-            del self.contriFacts[drop]
+        self._contri.add(t1, t2)
 
     def collHandler(self, fact: Fact):
         """Add Fact(coll, [A, B, C])
@@ -513,39 +1028,23 @@ class Database:
         Case 3: coll(B, F, G)
         Case 4: coll(X, Y, Z)
 
-        Additionally, we need to adjust the key changes in eqangleFacts
+        Any number of lines can be merged at once. The oldest key is kept
+        and the others resolve to it through findLine.
         """
 
-        def overlaps(set1: set, set2: set) -> bool:
-            return len(set1.intersection(set2)) >= 2
-
-        overlapsMap = [
-            lk for lk, points in self.lines.items()
-            if overlaps(set(points), set(fact.objects))
-        ]
+        ids = sorted({self.symbols.intern(p) for p in fact.objects})
+        overlapsMap = {
+            self.findLine(self._pair_line[pair])
+            for pair in itertools.combinations(ids, 2)
+            if pair in self._pair_line
+        }
 
         if len(overlapsMap) == 0:
             # case 4
-            self.lines[self.newLineName] = sorted(set(fact.objects))
-        elif len(overlapsMap) == 1:
-            # case 1 and case 3
-            self.lines[overlapsMap[0]] = sorted(
-                set(self.lines[overlapsMap[0]]).union(set(fact.objects)))
-        elif len(overlapsMap) >= 2:
-            # case 2
-            keep, drop = overlapsMap
-            self.lines[keep] = sorted(
-                set(self.lines[keep]).union(
-                    set(self.lines[drop]).union(set(fact.objects))))
-            del self.lines[drop]
-
-            # key changes in eqangleFacts
-            for angles in self.eqangleFacts:
-                for angle in angles:
-                    if angle.lk1 == drop:
-                        angle.lk1 = keep
-                    if angle.lk2 == drop:
-                        angle.lk2 = keep
+            self._set_line(self.newLineName, set(fact.objects))
+        else:
+            # case 1, 2 and 3
+            self._merge_lines(overlapsMap, fact.objects)
 
     def congHandler(self, fact: Fact):
         """Add Fact(cong, [s1, s2])
@@ -556,126 +1055,119 @@ class Database:
         Case 3: cong(s1, s4)
         Case 4: cong(s7, s8)
 
-        Additionally, we need to adjust the key changes in eqratioFacts
+        Any number of classes can be merged at once. The oldest key is
+        kept and the others resolve to it through findCong.
         """
 
         s1, s2 = fact.objects
-
-        def overlaps(set1: set, set2: set) -> bool:
-            return len(set1.intersection(set2)) > 0
-
-        overlapsMap = [
-            cKey for cKey, segments in self.congs.items()
-            if overlaps(set(segments), {s1, s2})
-        ]
+        overlapsMap = {self.findSegment(s1), self.findSegment(s2)} - {None}
 
         if len(overlapsMap) == 0:
             # case 4
-            self.congs[self.newCongName] = sorted({s1, s2})
-        elif len(overlapsMap) == 1:
-            # case 1 and case 2
-            self.congs[overlapsMap[0]] = sorted(
-                set(self.congs[overlapsMap[0]]).union({s1, s2}))
-        elif len(overlapsMap) >= 2:
-            # case 3
-            keep, drop = overlapsMap
-            self.congs[keep] = sorted(
-                set(self.congs[keep]).union(set(self.congs[drop])))
-            del self.congs[drop]
-
-            # handle key changes in eqratioFacts
-            for ratios in self.eqratioFacts:
-                for ratio in ratios:
-                    if ratio.c1 == drop:
-                        ratio.c1 = keep
-                    if ratio.c2 == drop:
-                        ratio.c2 = keep
-
-            # check eqratioFacts
-            # the key changes may make some eqratio fact
-            # obvious and should be removed
-            self.eqratioFacts = [
-                ratios for ratios in self.eqratioFacts
-                if len(set(list(ratios))) > 1
-            ]
+            self._set_cong(self.newCongName, {s1, s2})
+        else:
+            # case 1, 2 and 3
+            self._merge_congs(overlapsMap, {s1, s2})
 
     def midpHandler(self, fact: Fact):
         """Add Fact(midp, [M,A,B])
         """
         M, A, B = fact.objects
-        A, B = sorted([A, B])
-
-        if [M, A, B] not in self.midpFacts:
-            self.midpFacts.append([M, A, B])
+        self._add_midp(M, A, B)
 
     def paraHandler(self, fact: Fact):
         """Add Fact(para, [LK1, LK2])
+
+        Merges the direction classes of both lines, which may join two
+        existing para classes.
         """
         lk1, lk2 = fact.objects
-        found = False
-        i = 0
-        while i < len(self.paraFacts) and not found:
-            if lk1 in self.paraFacts[i] or lk2 in self.paraFacts[i]:
-                self.paraFacts[i] = self.paraFacts[i].union({lk1, lk2})
-                found = True
-            i += 1
-
-        if not found:
-            self.paraFacts.append({lk1, lk2})
+        self._add_para(lk1, lk2)
 
     def perpHandler(self, fact: Fact):
         """Add Fact(perp, [LK1, LK2])
         """
         lk1, lk2 = fact.objects
-        if {lk1, lk2} not in self.perpFacts:
-            self.perpFacts.append({lk1, lk2})
+        self._add_perp(lk1, lk2)
+
+    def _touch(self, relation: str) -> None:
+        self._versions[relation] += 1
 
     def containsFact(self, fact: Fact) -> bool:
         """
         Check if a fact is contained by the database
+
+        Answers are memoized and reused as long as none of the relations
+        the fact is checked against has changed.
         """
+        relations = _FACT_RELATIONS.get(fact.type)
+        if relations is None:
+            return self._containsFact(fact)
+        memo = self._contains_memo
+        stamp = tuple(self._versions[r] for r in relations)
+        entry = memo.get(fact)
+        if entry is not None and entry[0] == stamp:
+            memo.move_to_end(fact)
+            self._contains_hits += 1
+            return entry[1]
+
+        self._contains_misses += 1
+        contained = self._containsFact(fact)
+        # the check itself may add lines or congs
+        memo[fact] = (tuple(self._versions[r] for r in relations), contained)
+        memo.move_to_end(fact)
+        if len(memo) > self._contains_size:
+            memo.popitem(last=False)
+        return contained
+
+    def containsFactInfo(self) -> dict[str, int]:
+        """Hits, misses and size of the containsFact memo."""
+        return {
+            "hits": self._contains_hits,
+            "misses": self._contains_misses,
+            "size": len(self._contains_memo),
+        }
+
+    def _containsFact(self, fact: Fact) -> bool:
         if fact.type == "coll":
             # Fact(coll, [p1,p2,..])
-            for _, points in self.lines.items():
-                if all(p in points for p in fact.objects):
-                    return True
-            return False
+            q = self.symbols.lookup_mask(fact.objects)
+            if q is None:
+                return False
+            ids = self.symbols.ids(q)
+            if len(ids) < 2:
+                return bool(self._line_mask) and all(
+                    self._point_lines.get(i) for i in ids)
+            lk = self._pair_line.get((ids[0], ids[1]))
+            return (lk is not None
+                    and self._line_mask[self.findLine(lk)] & q == q)
 
         if fact.type == "midp":
             # Fact(midp, [M,A,B])
             M, A, B = fact.objects
-            A, B = sorted([A, B])
-            return [M, A, B] in self.midpFacts
+            return M in self.midpoints(A, B)
 
         if fact.type == "para":
             # Fact(para, [LK1, LK2])
             lk1, lk2 = fact.objects
-            for parafact in self.paraFacts:
-                if lk1 in parafact and lk2 in parafact:
-                    return True
-            return False
+            return self.isPara(lk1, lk2)
 
         if fact.type == "eqangle":
             # Fact(eqangle, [LK1, LK2, LK3 ,LK4])
-            lk1, lk2, lk3, lk4 = fact.objects
-            for angles in self.eqangleFacts:
-                if Angle(lk1, lk2) in angles and Angle(lk3, lk4) in angles:
-                    return True
-                if Angle(lk2, lk1) in angles and Angle(lk4, lk3) in angles:
-                    return True
-                if Angle(lk1, lk3) in angles and Angle(lk2, lk4) in angles:
-                    return True
-                if Angle(lk3, lk1) in angles and Angle(lk4, lk2) in angles:
+            lk1, lk2, lk3, lk4 = map(self.findLine, fact.objects)
+            for (a1, a2) in [(Angle(lk1, lk2), Angle(lk3, lk4)),
+                             (Angle(lk2, lk1), Angle(lk4, lk3)),
+                             (Angle(lk1, lk3), Angle(lk2, lk4)),
+                             (Angle(lk3, lk1), Angle(lk4, lk2))]:
+                cls = self.angleClass(a1)
+                if cls is not None and cls == self.angleClass(a2):
                     return True
             return False
 
         if fact.type == "cong":
             # Fact(cong, [S1, S2])
-            s1, s2 = fact.objects
-            for segments in self.congs.values():
-                if s1 in segments and s2 in segments:
-                    return True
-            return False
+            ck1, ck2 = map(self.findSegment, fact.objects)
+            return ck1 is not None and ck1 == ck2
 
         if fact.type == "eqratio":
             # Fact(eqratio, [S1, S2, S3, S4])
@@ -684,77 +1176,74 @@ class Database:
             ck2 = self.matchCong([s2.p1, s2.p2])
             ck3 = self.matchCong([s3.p1, s3.p2])
             ck4 = self.matchCong([s4.p1, s4.p2])
-            for ratios in self.eqratioFacts:
-                if Ratio(ck1, ck2) in ratios and Ratio(ck3, ck4) in ratios:
-                    return True
-                if Ratio(ck2, ck1) in ratios and Ratio(ck4, ck3) in ratios:
-                    return True
-                if Ratio(ck1, ck3) in ratios and Ratio(ck2, ck4) in ratios:
-                    return True
-                if Ratio(ck3, ck1) in ratios and Ratio(ck4, ck2) in ratios:
+            for (r1, r2) in [(Ratio(ck1, ck2), Ratio(ck3, ck4)),
+                             (Ratio(ck2, ck1), Ratio(ck4, ck3)),
+                             (Ratio(ck1, ck3), Ratio(ck2, ck4)),
+                             (Ratio(ck3, ck1), Ratio(ck4, ck2))]:
+                cls = self.ratioClass(r1)
+                if cls is not None and cls == self.ratioClass(r2):
                     return True
             return False
 
         if fact.type == "perp":
             # Fact(perp, [lk1, lk2])
             lk1, lk2 = fact.objects
-            return {lk1, lk2} in self.perpFacts
+            return self.isPerp(lk1, lk2)
 
         if fact.type == "simtri":
             # Fact(simtri, [T1, T2])
             t1, t2 = fact.objects
-            for tris in self.simtriFacts:
-                if t1 in tris and t2 in tris:
-                    return True
-            return False
+            return self._simtri.same_class(t1, t2)
 
         if fact.type == "contri":
             # Fact(contri, [T1, T2])
             t1, t2 = fact.objects
-            for tris in self.contriFacts:
-                if t1 in tris and t2 in tris:
-                    return True
-            return False
+            return self._contri.same_class(t1, t2)
 
         if fact.type == "circle":
             # Fact(circle, [O, P1, P2, ..])
-            center, points = fact.objects[0], fact.objects[1:]
-            for circle in self.circles:
-                if center == circle.center and all(
-                    [p in circle.points for p in points]):
-                    return True
-
-            return False
+            center = fact.objects[0]
+            q = self.symbols.lookup_mask(fact.objects[1:])
+            return q is not None and any(
+                self._circle_mask[c] & q == q
+                for c in self._center_circles.get(center, ()))
 
         if fact.type == "cyclic":
             # Fact(cyclic, [P1, P2, P3, P4])
-            for circle in self.circles:
-                if all([p in circle.points for p in fact.objects]):
-                    return True
-            return False
+            q = self.symbols.lookup_mask(fact.objects)
+            # only the circles through the first point can hold them all
+            return q is not None and any(
+                self._circle_mask[c] & q == q
+                for c in self._circles_through(q & -q))
 
         raise ValueError("Invalid type of fact ", fact.type)
 
     @property
     def newLineName(self):
-        for n in range(1, 50):
-            if f'line{n}' not in self.lines:
-                return f'line{n}'
-        raise ValueError("Running out names for lines!")
+        """A fresh line name. Every access allocates a new one."""
+        return self._fresh_name("line", self._line_names, self._lineUF)
 
     @property
     def newCongName(self):
-        for n in range(1, 50):
-            if f'cong{n}' not in self.congs:
-                return f'cong{n}'
-        raise ValueError("Running out names for congs!")
+        """A fresh cong name. Every access allocates a new one."""
+        return self._fresh_name("cong", self._cong_names, self._congUF)
 
     @property
     def newCenterName(self):
-        for n in range(1, 50):
-            if f'O{n}' not in [c.center for c in self.circles]:
-                return f'O{n}'
-        raise ValueError("Running out names for centers!")
+        """A fresh circle center. Every access allocates a new one."""
+        return self._fresh_name("O", self._center_names,
+                                self._center_circles)
+
+    def _fresh_name(self, prefix: str, numbers, taken) -> str:
+        """prefix followed by the next number, skipping taken names.
+
+        Numbers only go up, so merged names, which still resolve to
+        their line or cong, are never reused.
+        """
+        while True:
+            name = f"{prefix}{next(numbers)}"
+            if name not in taken:
+                return name
 
     def matchLine(self, points: list[Point]):
         """Search for the line, if found, return the name;
@@ -762,12 +1251,18 @@ class Database:
         return the new name
         """
         assert len(points) == 2
-        for name, line in self.lines.items():
-            if all(p in line for p in points):
-                return name
+        i, j = map(self.symbols.intern, points)
+        if i == j:
+            lines = self._point_lines.get(i)
+            if lines:
+                return min(lines, key=self._line_seq.__getitem__)
+        else:
+            name = self._pair_line.get((i, j) if i < j else (j, i))
+            if name is not None:
+                return self.findLine(name)
 
         newName = self.newLineName
-        self.lines[newName] = sorted(points)
+        self._set_line(newName, points)
         return newName
 
     def matchCong(self, points: list[Point]):
@@ -776,15 +1271,12 @@ class Database:
         return the new name
         """
         assert len(points) == 2
-        p1, p2 = points
-        for name, cong in self.congs.items():
-            # cong is a list of segments
-            for segment in cong:
-                if str(segment) in [f"{p1}{p2}", f"{p2}{p1}"]:
-                    return name
+        name = self.findSegment(Segment(*points))
+        if name is not None:
+            return name
 
         newName = self.newCongName
-        self.congs[newName] = {Segment(*points)}
+        self._set_cong(newName, {Segment(*points)})
         return newName
 
     def __repr__(self) -> str:
@@ -884,35 +1376,38 @@ class Database:
         return s
 
     def angle_to_str(self, angle: Angle):
-        l1, l2 = angle.lk1, angle.lk2
+        l1, l2 = self.findLine(angle.lk1), self.findLine(angle.lk2)
         p1str = ','.join(sorted(self.lines[l1]))
         p2str = ','.join(sorted(self.lines[l2]))
         return f"Angle([{p1str}],[{p2str}])"
 
     def ratio_to_str(self, ratio: Ratio):
-        c1, c2 = ratio.c1, ratio.c2
+        c1, c2 = self.findCong(ratio.c1), self.findCong(ratio.c2)
         c1str = ",".join([str(s) for s in self.congs[c1]])
         c2str = ",".join([str(s) for s in self.congs[c2]])
         return f"Ratio([{c1str}],[{c2str}])"
 
     def lineIntersection(self, lineA: LineKey, lineB: LineKey) -> list[Point]:
-        """Find intersection of two lines."""
+        """Find intersection of two lines.
+
+        Results are cached until one of the lines gains points or is
+        merged. Do not modify the result.
+        """
         # TODO: return an adhoc point if no intersection are found,
         #       combine all resulting points when multiple points are found.
-        # print("DATABASE::LINE_INTERSECTION",
-        #       self.lines[lineA].intersection(self.lines[lineB]))
-        inter = list(
-            set(self.lines[lineA]).intersection(set(self.lines[lineB])))
-        if not inter:
-            # SHOULD CHECK parallelness, otherwise the temp point is infinity.
-            # print("Warning: DATABASE::LINE_INTERSECTION",
-            #       f"intersection of {lineA} and {lineB} is empty.")
-            return []
-
-            point = self.next_temp_point_key()
-            self.lines[lineA].add(point)
-            self.lines[lineB].add(point)
-            return [point]
+        lineA, lineB = self.findLine(lineA), self.findLine(lineB)
+        pair = (lineA, lineB) if lineA < lineB else (lineB, lineA)
+        inter = self._intersections.get(pair)
+        if inter is None:
+            # An empty result is cached as well. SHOULD CHECK parallelness,
+            # otherwise the temp point is infinity.
+            inter = sorted(
+                self.symbols.symbol(i)
+                for i in self.symbols.ids(self._line_mask[lineA]
+                                          & self._line_mask[lineB]))
+            self._intersections[pair] = inter
+            for lk in pair:
+                self._line_pairs.setdefault(lk, set()).add(pair)
         return inter
 
     def next_temp_point_key(self):
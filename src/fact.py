@@ -2,15 +2,89 @@ r"""
 fact.py
 """
 
+import weakref
+
+from src.primitives import Segment, Triangle
+
+# Order in which the agenda processes the fact types
+FACT_TYPES = (
+    "coll",
+    "cong",
+    "midp",
+    "para",
+    "perp",
+    "eqangle",
+    "eqratio",
+    "simtri",
+    "contri",
+    "cyclic",
+    "circle",
+)
+_TYPE_ORDINAL = {t: i for i, t in enumerate(FACT_TYPES)}
+
+_UNORDERED_TYPES = frozenset(
+    ["cyclic", "simtri", "contri", "perp", "para", "coll"])
+
+
+def _canonical_object(obj):
+    """Plain tuple for segments and (ordered) triangles, obj otherwise."""
+    if type(obj) is Segment:
+        return (obj.p1, obj.p2)
+    if type(obj) is Triangle:
+        return obj.vertices
+    return obj
+
+
+# Weak-value pool of live facts, keyed by canonical key
+_POOL = weakref.WeakValueDictionary()
+
+
+def _canonical_key(type, objects: tuple) -> tuple:
+    """(type ordinal, type, normalized objects) of a fact.
+
+    Two facts are the same iff their keys are equal, and facts are
+    sorted by key. This follows the normalization of `Fact.__repr__`.
+    """
+    objects = tuple(_canonical_object(o) for o in objects)
+    if type in _UNORDERED_TYPES:
+        objects = tuple(sorted(objects))
+    elif type == "eqangle":
+        l1, l2, l3, l4 = objects
+        if (l3, l4) <= (l1, l2):
+            objects = (l3, l4, l1, l2)
+    elif type == "midp":
+        objects = (objects[0], ) + tuple(sorted(objects[1:]))
+    return (_TYPE_ORDINAL.get(type, len(FACT_TYPES)), type, objects)
+
 
 class Fact:
+    """Hash-consed fact.
+
+    `Fact(type, objects)` returns the live instance with the same
+    canonical key if there is one, so equal facts are identical and
+    `==` is an identity check. Objects are stored as a tuple, in the
+    order of whichever instance was created first.
+    """
+    __slots__ = ("type", "objects", "_key", "_hash", "__weakref__")
+
+    def __new__(cls, type, objects) -> 'Fact':
+        objects = tuple(objects)
+        key = _canonical_key(type, objects)
+        fact = _POOL.get(key)
+        if fact is None:
+            fact = super().__new__(cls)
+            fact.type = type
+            fact.objects = objects
+            fact._key = key
+            fact._hash = hash(key)
+            _POOL[key] = fact
+        return fact
 
-    def __init__(self, type, objects) -> None:
-        self.type = type
-        self.objects = objects
+    def __reduce__(self):
+        return (Fact, (self.type, self.objects))
 
     def __repr__(self):
-        if self.type in ["cyclic", "simtri", "contri", "perp", "para", "coll"]:
+        if self.type in _UNORDERED_TYPES:
             return f"{self.type} ({sorted(self.objects)})"
         if self.type == "eqangle":
             l1, l2, l3, l4 = self.objects
@@ -19,34 +93,15 @@ class Fact:
             return f"{self.type} {l3,l4,l1,l2}"
         if self.type == "midp":
             return f"{self.type} {self.objects[0], sorted(self.objects[1:])}"
-        return f"{self.type} ({self.objects})"
+        return f"{self.type} ({list(self.objects)})"
 
     def __hash__(self) -> int:
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other: 'Fact') -> bool:
-        if isinstance(other, Fact):
-            return str(self) == str(other)
-        return False
+        return self is other
 
     def __lt__(self, other: 'Fact') -> bool:
         """Used by the sorting algorithm
         """
-        types = [
-            "coll",
-            "cong",
-            "midp",
-            "para",
-            "perp",
-            "eqangle",
-            "eqratio",
-            "simtri",
-            "contri",
-            "cyclic",
-            "circle",
-        ]
-
-        if self.type != other.type:
-            return types.index(self.type) < types.index(other.type)
-
-        return str(self) < str(other)
\ No newline at end of file
+        return self._key < other._key
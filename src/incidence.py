@@ -0,0 +1,116 @@
+r"""
+incidence.py
+
+NumPy views of a database for bulk queries. NumPy is an optional
+dependency, imported only when a view is created.
+"""
+
+import itertools
+
+from src.primitives import LineKey, Point, Segment
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("IncidenceView needs numpy") from e
+    return numpy
+
+
+class IncidenceView:
+    """Incidence matrices and class labels of a database.
+
+    Matrix rows are points, in the order of their ids in
+    `database.symbols`. Columns are lines, in `database.lines` order, or
+    circles, in `database.circles` order. The database keeps the points
+    of every line and circle as a bitmask, updated fact by fact. A matrix
+    is rebuilt from those masks when it is read after they changed, and
+    reused otherwise. The returned arrays are read-only.
+    """
+
+    def __init__(self, database) -> None:
+        self.np = _numpy()
+        self.database = database
+        self._cache = {}
+
+    @property
+    def points(self) -> list[Point]:
+        symbols = self.database.symbols
+        return [symbols.symbol(i) for i in range(len(symbols))]
+
+    @property
+    def line_keys(self) -> list[LineKey]:
+        return list(self.database.lines)
+
+    def point_line(self):
+        """Boolean points x lines incidence matrix."""
+        masks = [self.database.lineMask(lk) for lk in self.database.lines]
+        return self._matrix("lines", masks)
+
+    def point_circle(self):
+        """Boolean points x circles incidence matrix."""
+        return self._matrix("circles", self.database.circleMasks())
+
+    def line_directions(self):
+        """Direction (para class) label of every line, from 0 on."""
+        labels, index = [], {}
+        for lk in self.database.lines:
+            d = self.database.findDirection(lk)
+            labels.append(index.setdefault(d, len(index)))
+        return self.np.array(labels, dtype=self.np.intp)
+
+    def segment_congs(self) -> tuple[list[Segment], object]:
+        """Every segment of a cong class, with the label of its class."""
+        segments, labels = [], []
+        for label, ck in enumerate(self.database.congs):
+            for segment in self.database.congs[ck]:
+                segments.append(segment)
+                labels.append(label)
+        return segments, self.np.array(labels, dtype=self.np.intp)
+
+    def line_intersections(self) -> dict[tuple[LineKey, LineKey], Point]:
+        """The point of every pair of lines meeting in exactly one point.
+
+        All pairs come from two matrix products: one counts the common
+        points, the other sums their ids.
+        """
+        np = self.np
+        incidence = self.point_line().astype(np.intp)
+        counts = incidence.T @ incidence
+        ids = incidence * np.arange(incidence.shape[0])[:, None]
+        sums = incidence.T @ ids
+        keys, symbols = self.line_keys, self.database.symbols
+        return {(keys[a], keys[b]): symbols.symbol(int(sums[a, b]))
+                for a, b in zip(*np.nonzero(np.triu(counts == 1, k=1)))}
+
+    def collinear_triples(self) -> set[tuple[Point, Point, Point]]:
+        """Every triple of points on a common line, names sorted."""
+        symbols = self.database.symbols
+        triples = set()
+        for column in self.point_line().T:
+            ids = self.np.flatnonzero(column).tolist()
+            triples.update(
+                tuple(sorted(symbols.symbol(i) for i in triple))
+                for triple in itertools.combinations(ids, 3))
+        return triples
+
+    def _matrix(self, name: str, masks: list[int]):
+        """Boolean points x len(masks) matrix with the bits of masks."""
+        np = self.np
+        n = len(self.database.symbols)
+        key = (n, tuple(masks))
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        nbytes = max(1, (n + 7) // 8)
+        matrix = np.zeros((n, len(masks)), dtype=bool)
+        for col, mask in enumerate(masks):
+            bits = np.unpackbits(np.frombuffer(mask.to_bytes(nbytes, "little"),
+                                               dtype=np.uint8),
+                                 bitorder="little")
+            matrix[:, col] = bits[:n]
+        matrix.flags.writeable = False
+        self._cache[name] = (key, matrix)
+        return matrix
@@ -1,4 +1,5 @@
 from src.predicate import Predicate
+from src.agenda import Agenda
 from src.database import Database
 from src.rules import FC
 from src.fact import Fact
@@ -17,12 +18,7 @@ def inference_update(
     Return the updated database, reward, 
     """
 
-    facts_to_add = []
-    for p in predicates_to_add:
-        to_add = db._predicate_to_fact(p)
-        if to_add not in facts_to_add:
-            facts_to_add.append(to_add)
-    facts_to_add = sorted(facts_to_add)
+    facts_to_add = Agenda(db._predicate_to_fact(p) for p in predicates_to_add)
 
     increased_facts = []
     used = {}
@@ -37,7 +33,7 @@ def inference_update(
 
     while facts_to_add:
 
-        fact = facts_to_add.pop(0)
+        fact = facts_to_add.pop()
 
         if fact in used and used[fact] == db.version:
             continue
@@ -58,14 +54,12 @@ def inference_update(
 
         if verbose: print("\nNEW FACTS:")
         for new_fact in set(new_facts):
-            if db.containsFact(new_fact) or fact in facts_to_add:
+            if db.containsFact(new_fact):
                 continue
 
-            facts_to_add.append(new_fact)
+            facts_to_add.push(new_fact)
             if verbose: print(new_fact)
 
-        facts_to_add = sorted(set(facts_to_add))
-
         if not db.containsFact(fact):
             db.addFact(fact)
             increased_facts.append(fact)
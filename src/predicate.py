@@ -1,40 +1,84 @@
 """predicate.py
 """
 
+import re
+from typing import Iterable, Optional
 
-class Predicate:
+from src.primitives import _Frozen
+
+# type(arg, arg, ...) with an optional trailing full stop
+_PREDICATE_RE = re.compile(r"\s*(\w+)\s*\(([^()]*)\)\s*\.?\s*")
+
+
+class Predicate(_Frozen):
     '''Predicate is simple fact, such as coll(A,B,C) or para(A,B,C,D)
     where A,B,C,D are concrete points.
+
+    Predicates are immutable like the primitives: points and lines are
+    stored as tuples and the hash is computed once.
     '''
+    __slots__ = ("type", "points", "lines")
 
     def __init__(self,
                  type: str,
-                 points: list[str] = [],
-                 lines: list[str] = []) -> None:
+                 points: Iterable[str] = (),
+                 lines: Iterable[str] = ()) -> None:
         """Initialize."""
-        self.type = type
-        self.points = points
-        self.lines = lines
+        points, lines = tuple(points), tuple(lines)
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "points", points)
+        object.__setattr__(self, "lines", lines)
+        self._freeze((type, points, lines))
+
+    def __reduce__(self):
+        return (Predicate, (self.type, self.points, self.lines))
 
     @classmethod
     def from_line(cls, line: str) -> 'Predicate':
-        line = line.rstrip(".").strip()
-        between_parent = line[line.find("(") + 1:line.find(")")]
+        """Parse a line such as `coll(A, B, C).`
+
+        Raise ValueError if the line is not of that form.
+        """
+        predicate = _parse(line)
+        if predicate is None:
+            raise ValueError(f"Malformed predicate: {line.strip()!r}")
+        return predicate
 
-        type = line[:line.find("(")]
-        points = [p.strip() for p in between_parent.split(",")]
+    @classmethod
+    def parse_lines(
+        cls, lines: Iterable[str]
+    ) -> tuple[list['Predicate'], list[tuple[int, str]]]:
+        """Parse many lines at once, skipping blank ones.
 
-        return Predicate(type=type, points=points)
+        Malformed lines do not stop the parse. They are returned as
+        (line number, line) pairs next to the parsed predicates.
+        """
+        predicates, errors = [], []
+        for lineno, line in enumerate(lines, start=1):
+            if not line or line.isspace():
+                continue
+            predicate = _parse(line)
+            if predicate is None:
+                errors.append((lineno, line.rstrip("\n")))
+            else:
+                predicates.append(predicate)
+        return predicates, errors
 
     def __repr__(self) -> str:
         return (f"({self.type}, points({','.join(self.points)})," +
-                f"lines({self.lines.__repr__()}))")
+                f"lines({list(self.lines).__repr__()}))")
 
-    def __eq__(self, other: 'Predicate') -> bool:
-        return str(self) == str(other)
 
-    def __hash__(self) -> int:
-        return hash(str(self))
+def _parse(line: str) -> Optional[Predicate]:
+    """Parse one line in a single regex match, None if malformed."""
+    match = _PREDICATE_RE.fullmatch(line)
+    if match is None:
+        return None
+    type, args = match.groups()
+    points = [p.strip() for p in args.split(",")]
+    if not all(points):
+        return None
+    return Predicate(type, points)
 
 
 if __name__ == "__main__":
@@ -43,4 +87,4 @@ if __name__ == "__main__":
             "  coll(A,B,C)    ."
     ]:
         p = Predicate.from_line(test_line)
-        assert str(p) == "(coll, points(A,B,C))"
+        assert str(p) == "(coll, points(A,B,C),lines([]))"
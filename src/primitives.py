@@ -1,3 +1,7 @@
+import sys
+from typing import Optional
+
+
 class Point:
     pass
 
@@ -10,97 +14,199 @@ class CongKey:
     pass
 
 
-class Angle:
+class SymbolTable:
+    """Intern the points of one database to small integers.
+
+    Ids are handed out consecutively from 0, so they can index lists and
+    are cheap to hash, compare and sort. String symbols are also passed
+    through `sys.intern` so equal names share one object.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict = {}
+        self._symbols: list = []
+
+    def intern(self, symbol) -> int:
+        """Return the id of symbol, allocating a new one if unseen."""
+        i = self._ids.get(symbol)
+        if i is None:
+            if isinstance(symbol, str):
+                symbol = sys.intern(symbol)
+            i = len(self._symbols)
+            self._ids[symbol] = i
+            self._symbols.append(symbol)
+        return i
+
+    def lookup(self, symbol) -> Optional[int]:
+        """Return the id of symbol, or None if it was never interned."""
+        return self._ids.get(symbol)
+
+    def symbol(self, i: int):
+        return self._symbols[i]
+
+    def pair(self, p1, p2) -> tuple[int, int]:
+        """Canonical (unordered) id pair of two symbols."""
+        i, j = self.intern(p1), self.intern(p2)
+        return (i, j) if i < j else (j, i)
+
+    def mask(self, symbols) -> int:
+        """Bitmask with the bit of every symbol's id set, interning them."""
+        mask = 0
+        for symbol in symbols:
+            mask |= 1 << self.intern(symbol)
+        return mask
+
+    def lookup_mask(self, symbols) -> Optional[int]:
+        """Bitmask of the symbols, or None if one was never interned."""
+        mask = 0
+        for symbol in symbols:
+            i = self._ids.get(symbol)
+            if i is None:
+                return None
+            mask |= 1 << i
+        return mask
+
+    def ids(self, mask: int) -> list[int]:
+        """Ids of the bits set in mask, in increasing order."""
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self._ids
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+
+class _Frozen:
+    """Base of the immutable primitives.
+
+    Subclasses compute a canonical `_key` tuple and its hash once in
+    `__init__`; equality and hashing only look at those two slots.
+    Subclasses also define `__reduce__` so that copy and pickle rebuild
+    them through `__init__` instead of setting slots.
+    """
+    __slots__ = ("_key", "_hash")
+
+    def _freeze(self, key: tuple) -> None:
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_hash", hash(key))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __eq__(self, other) -> bool:
+        if type(other) is type(self):
+            return self._hash == other._hash and self._key == other._key
+        return False
+
+    def __hash__(self) -> int:
+        return self._hash
+
+
+class Angle(_Frozen):
+    __slots__ = ("lk1", "lk2")
 
     def __init__(self, lk1: LineKey, lk2: LineKey) -> None:
-        self.lk1 = lk1
-        self.lk2 = lk2
+        object.__setattr__(self, "lk1", lk1)
+        object.__setattr__(self, "lk2", lk2)
+        self._freeze((lk1, lk2))
 
-    def __eq__(self, other: 'Angle') -> bool:
-        if isinstance(other, Angle):
-            return self.lk1 == other.lk1 and self.lk2 == other.lk2
-        return False
+    def __reduce__(self):
+        return (Angle, (self.lk1, self.lk2))
 
-    def __hash__(self) -> int:
-        return hash(f"{self.lk1}, {self.lk2}")
+    def reindex(self, keys: dict[LineKey, LineKey]) -> 'Angle':
+        """Return the angle with its line keys renamed through keys."""
+        return Angle(keys.get(self.lk1, self.lk1), keys.get(self.lk2, self.lk2))
 
     def __repr__(self) -> str:
         return f"[ {self.lk1}, {self.lk2} ]"
 
 
-class Segment:
+class Segment(_Frozen):
+    __slots__ = ("p1", "p2")
 
     def __init__(self, p1: Point, p2: Point) -> None:
-        self.p1, self.p2 = sorted([p1, p2])
-
-    def __eq__(self, other: 'Segment') -> bool:
-        if isinstance(other, Segment):
-            return self.p1 == other.p1 and self.p2 == other.p2
-        return False
+        if p2 < p1:
+            p1, p2 = p2, p1
+        object.__setattr__(self, "p1", p1)
+        object.__setattr__(self, "p2", p2)
+        self._freeze((p1, p2))
 
-    def __hash__(self) -> int:
-        return hash(str(self))
+    def __reduce__(self):
+        return (Segment, (self.p1, self.p2))
 
     def __repr__(self) -> str:
         return "".join([self.p1, self.p2])
 
     def __lt__(self, other) -> bool:
-        return str(self) < str(other)
+        return self._key < other._key
 
 
-class Ratio:
+class Ratio(_Frozen):
+    __slots__ = ("c1", "c2")
 
     def __init__(self, c1: CongKey, c2: CongKey) -> None:
-        self.c1 = c1
-        self.c2 = c2
+        object.__setattr__(self, "c1", c1)
+        object.__setattr__(self, "c2", c2)
+        self._freeze((c1, c2))
 
-    def __eq__(self, other: 'Ratio') -> bool:
-        if isinstance(other, Ratio):
-            return self.c1 == other.c1 and self.c2 == other.c2
-        return False
+    def __reduce__(self):
+        return (Ratio, (self.c1, self.c2))
 
-    def __hash__(self) -> int:
-        return hash(f"{self.c1}, {self.c2}")
+    def reindex(self, keys: dict[CongKey, CongKey]) -> 'Ratio':
+        """Return the ratio with its cong keys renamed through keys."""
+        return Ratio(keys.get(self.c1, self.c1), keys.get(self.c2, self.c2))
 
     def __repr__(self) -> str:
         return f"[{self.c1}, {self.c2}]"
 
 
-class Triangle:
+class Triangle(_Frozen):
+    """Triangle with ordered vertices.
+
+    Equality and hashing ignore the vertex order, comparison does not.
+    """
+    __slots__ = ("p1", "p2", "p3")
 
     def __init__(self, p1: Point, p2: Point, p3: Point) -> None:
-        self.p1, self.p2, self.p3 = p1, p2, p3
+        object.__setattr__(self, "p1", p1)
+        object.__setattr__(self, "p2", p2)
+        object.__setattr__(self, "p3", p3)
+        self._freeze(tuple(sorted((p1, p2, p3))))
 
-    def __eq__(self, other: 'Triangle') -> bool:
-        if isinstance(other, Triangle):
-            return sorted([self.p1, self.p2,
-                           self.p3]) == sorted([other.p1, other.p2, other.p3])
-        return False
+    def __reduce__(self):
+        return (Triangle, self.vertices)
 
-    def __hash__(self) -> int:
-        return hash("".join(sorted([self.p1, self.p2, self.p3])))
+    @property
+    def vertices(self) -> tuple[Point, Point, Point]:
+        return (self.p1, self.p2, self.p3)
 
     def __repr__(self) -> str:
         return "".join([self.p1, self.p2, self.p3])
 
     def __lt__(self, other) -> bool:
-        return str(self) < str(other)
+        return self.vertices < other.vertices
 
 
-class Circle:
+class Circle(_Frozen):
+    __slots__ = ("center", "points")
 
     def __init__(self, center: Point, points: set[Point]) -> None:
-        self.center = center
-        self.points = points
+        points = frozenset(points)
+        object.__setattr__(self, "center", center)
+        object.__setattr__(self, "points", points)
+        self._freeze((center, tuple(sorted(points))))
 
-    def __eq__(self, other: 'Circle') -> bool:
-        if isinstance(other, Circle):
-            return self.center == other.center and all(
-                sorted(self.points) == sorted(other.points))
-        return False
+    def __reduce__(self):
+        return (Circle, (self.center, self.points))
 
     def __repr__(self) -> str:
-        return f"circle({self.center}, {','.join(sorted(self.points))})"
-
-    def __hash__(self) -> int:
-        return hash(str(self))
\ No newline at end of file
+        return f"circle({self.center}, {','.join(self._key[1])})"
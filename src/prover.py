@@ -16,9 +16,12 @@ Step 4. Apply rule r to obtain a fact d0. If d0 is in the database, do nothing.
 Otherwise, add it to the end of the new-fact-list.
 """
 
+import itertools
+
 from src.primitives import Angle, Triangle, Ratio, Segment
 from src.predicate import Predicate
-from src.fact import Fact
+from src.agenda import Agenda
+from src.fact import Fact, FACT_TYPES
 from src.database import Database
 
 
@@ -26,31 +29,14 @@ class Prover:
 
     def __init__(self, hypotheses: list[Predicate]) -> None:
         self.database = Database()
-        self.newFactsList = []
 
         for h in hypotheses:
             self.database.addPredicate(h)
 
-        for h in hypotheses:
-            newFact = self.database._predicate_to_fact(h)
-            if newFact not in self.newFactsList:
-                self.newFactsList.append(newFact)
-
-        self.types = [
-            "coll",
-            "cong",
-            "midp",
-            "para",
-            "perp",
-            "eqangle",
-            "eqratio",
-            "simtri",
-            "contri",
-            "cyclic",
-            "circle",
-        ]
+        self.newFactsList = Agenda(
+            self.database._predicate_to_fact(h) for h in hypotheses)
 
-        self.newFactsList.sort()
+        self.types = list(FACT_TYPES)
 
     def prove(self, predicate: Predicate) -> bool:
         fact = self.database._predicate_to_fact(predicate)
@@ -61,7 +47,7 @@ class Prover:
         used = {}
         while self.newFactsList and i > 0:
             i -= 1
-            d: Fact = self.newFactsList.pop(0)
+            d: Fact = self.newFactsList.pop()
             print("POP FACT:", d)
 
             if d in used and used[d] == self.database.version:
@@ -70,7 +56,8 @@ class Prover:
                 used[d] = self.database.version
 
             newFacts = []
-            self.all_predicate_forms = set(
+            # a list keeps the forms in the order they are generated in
+            self.all_predicate_forms = list(
                 self.database._predicate_all_forms(d))
 
             for predicate in self.all_predicate_forms:
@@ -83,13 +70,10 @@ class Prover:
             print("\nNEW FACTS:")
 
             for fact in set(newFacts):
-                if self.database.containsFact(
-                        fact) or fact in self.newFactsList:
+                if self.database.containsFact(fact):
                     continue
-                self.newFactsList.append(fact)
-                print(fact)
-
-            self.newFactsList = sorted(set(self.newFactsList))
+                if self.newFactsList.push(fact):
+                    print(fact)
 
             if not self.database.containsFact(d):
                 self.database.addFact(d)
@@ -113,9 +97,10 @@ class Prover:
             facts += self._ruleD68(p)
             facts += self._ruleD69(p)
             facts += self._ruleD70(p)
-        if p.type == "para":
+        if p.type == "para" and p.lines:
             facts += self._ruleD40(p)
             facts += self._ruleD10para(p)
+        if p.type == "para" and not p.lines:
             facts += self._ruleD45para(p)
             facts += self._ruleD64(p)
             facts += self._ruleD65(p)
@@ -136,12 +121,13 @@ class Prover:
             facts += self._ruleD75cong(p)
         if p.type == "cyclic":
             facts += self._ruleD41(p)
-        if p.type == "perp":
+        if p.type == "perp" and p.lines:
             facts += self._ruleD09(p)
             facts += self._ruleD10perp(p)
-            facts += self._ruleD52perp(p)
             facts += self._ruleX2(p)
             facts += self._ruleX3(p)
+        if p.type == "perp" and not p.lines:
+            facts += self._ruleD52perp(p)
         if p.type == "simtri":
             facts += self._ruleD59(p)
             facts += self._ruleD60(p)
@@ -157,12 +143,7 @@ class Prover:
         """
         perp(A,B,C,D) & perp(P,Q,U,V) => eqangle(A,B,C,D,P,Q,U,V)
         """
-        if len(predicate.lines) == 2:
-            lAB, lCD = predicate.lines
-        else:
-            A, B, C, D = predicate.points
-            lAB = self.database.matchLine([A, B])
-            lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
         facts = []
         for [lPQ, lUV] in self.database.perpFacts:
             # print(lPQ, lUV, A, B, C, D)
@@ -180,9 +161,7 @@ class Prover:
         """
         perp(A,B,C,D) => eqangle(A,B,C,D,C,D,A,B)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         return [Fact("eqangle", [lAB, lCD, lCD, lAB])]
 
@@ -190,15 +169,10 @@ class Prover:
         """
         perp(A,B,C,D) & perp(C,D,E,F) => para(A,B,E,F)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         facts = []
-        for lines in self.database.perpFacts:
-            if lCD not in lines:
-                continue
-            lEF = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lEF in self.database.perpendicularLines(lCD):
             if lEF == lAB or lEF == lCD:
                 continue
             facts.append(Fact("para", [lAB, lEF]))
@@ -209,16 +183,11 @@ class Prover:
         """
         para(A,B,C,D) & perp(C,D,E,F) => perp(A,B,E,F)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         facts = []
         # find perp(lCD, ..) in perpfacts
-        for lines in self.database.perpFacts:
-            if lCD not in lines:
-                continue
-            lEF = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lEF in self.database.perpendicularLines(lCD):
             if lEF == lAB or lEF == lCD:
                 continue
             facts.append(Fact("perp", [lAB, lEF]))
@@ -229,16 +198,10 @@ class Prover:
         """
         perp(C,D,E,F) & para(A,B,C,D) => perp(A,B,E,F)
         """
-        C, D, E, F = predicate.points
-        lCD = self.database.matchLine([C, D])
-        lEF = self.database.matchLine([E, F])
+        lCD, lEF = predicate.lines
 
         facts = []
-        # find para(lAB, lCD) in perpfacts
-        for lines in self.database.paraFacts:
-            if lCD not in lines:
-                continue
-            lAB = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lAB in self.database.parallelLines(lCD):
             if lAB == lCD or lAB == lEF:
                 continue
             facts.append(Fact("perp", [lAB, lEF]))
@@ -321,16 +284,13 @@ class Prover:
         """
         para(A,B,C,D) => eqangle(A,B,P,Q,C,D,P,Q)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
         facts = []
         if lAB == lCD:
             return facts
         for lPQ in self.database.lines:
-            if lPQ in [lAB, lCD] or self.database.containsFact(
-                    Fact("para", [lPQ, lAB])) or self.database.containsFact(
-                        Fact("para", [lPQ, lCD])):
+            if lPQ in [lAB, lCD] or self.database.isPara(
+                    lPQ, lAB) or self.database.isPara(lPQ, lCD):
                 continue
             facts.append(Fact("eqangle", [lAB, lPQ, lCD, lPQ]))
         return facts
@@ -338,15 +298,21 @@ class Prover:
     def _ruleD41(self, predicate: Predicate):
         """
         cyclic(A,B,P,Q) => eqangle(P,A,P,B,Q,A,Q,B)
+
+        Fired on the new sets of four points of the circle. Of the 24
+        orders of a set, those that only swap P and Q give the same fact.
         """
-        A, B, P, Q = predicate.points
-        lPA = self.database.matchLine([P, A])
-        lPB = self.database.matchLine([P, B])
-        lQA = self.database.matchLine([Q, A])
-        lQB = self.database.matchLine([Q, B])
-        if lPA != lPB and lQA != lQB:
-            return [Fact("eqangle", [lPA, lPB, lQA, lQB])]
-        return []
+        facts = []
+        for points in self.database.newConcyclicQuadruples(predicate.points):
+            for A, B in itertools.permutations(points, 2):
+                P, Q = [X for X in points if X not in [A, B]]
+                lPA = self.database.matchLine([P, A])
+                lPB = self.database.matchLine([P, B])
+                lQA = self.database.matchLine([Q, A])
+                lQB = self.database.matchLine([Q, B])
+                if lPA != lPB and lQA != lQB:
+                    facts.append(Fact("eqangle", [lPA, lPB, lQA, lQB]))
+        return facts
 
     def _ruleD42a(self, predicate: Predicate):
         """
@@ -378,27 +344,26 @@ class Prover:
         """
         midp(E,A,B) & midp(F,A,C) => para(E,F,B,C)
         """
-        E, A1, B = predicate.points
+        E, A1, B1 = predicate.points
         facts = []
-        for midfact in self.database.midpFacts:
-            F, A2, C = midfact
-            if E == F:
-                continue
-
-            As = [p for p in [A1, B] if p in [A2, C]]
-            if len(As) != 1:
-                continue
+        if A1 == B1:
+            return facts
+        for A, B in [(A1, B1), (B1, A1)]:
+            for midfact in self.database.midpFactsAt(A):
+                F, A2, C = midfact
+                if E == F:
+                    continue
 
-            A = As[0]
-            B = B if A == A1 else A1
-            C = C if A == A2 else A2
-            if self.prove(Predicate("coll", [A, B, C])):
-                continue
+                C = C if A == A2 else A2
+                if C in [A1, B1]:
+                    continue
+                if self.prove(Predicate("coll", [A, B, C])):
+                    continue
 
-            lEF = self.database.matchLine([E, F])
-            lBC = self.database.matchLine([B, C])
+                lEF = self.database.matchLine([E, F])
+                lBC = self.database.matchLine([B, C])
 
-            facts.append(Fact("para", [lEF, lBC]))
+                facts.append(Fact("para", [lEF, lBC]))
 
         return facts
 
@@ -469,10 +434,8 @@ class Prover:
         if B1 != B2 or A == C or A == B1:
             return facts
 
-        for midfact in self.database.midpFacts:
-            if sorted([A, C]) == midfact[1:]:
-                M = midfact[0]
-                facts.append(Fact("cong", [Segment(A, M), Segment(B1, M)]))
+        for M in self.database.midpoints(A, C):
+            facts.append(Fact("cong", [Segment(A, M), Segment(B1, M)]))
 
         return facts
 
@@ -632,9 +595,9 @@ class Prover:
         simtri(A,B,C,P,Q,R) & cong(A,B,P,Q) => contri(A,B,C,P,Q,R)
         """
         A, B, C, P, Q, R = predicate.points
-        for _, segments in self.database.congs.items():
-            if Segment(A, B) in segments and Segment(P, Q) in segments:
-                return [Fact("contri", [Triangle(A, B, C), Triangle(P, Q, R)])]
+        if self.database.containsFact(
+                Fact("cong", [Segment(A, B), Segment(P, Q)])):
+            return [Fact("contri", [Triangle(A, B, C), Triangle(P, Q, R)])]
         return []
 
     def _ruleD62(self, predicate: Predicate):
@@ -651,12 +614,8 @@ class Prover:
         M, A, B = predicate.points
 
         facts = []
-        for midp in self.database.midpFacts:
-            if midp[0] != M:
-                continue
-            A_, B_ = sorted([A, B])
-            if [M, A_, B_] != midp:
-                C, D = midp[1:]
+        for C, D in self.database.bisectedSegments(M):
+            if sorted([A, B]) != [C, D]:
                 lAC = self.database.matchLine([A, C])
                 lBD = self.database.matchLine([B, D])
                 facts.append(Fact("para", [lAC, lBD]))
@@ -672,21 +631,12 @@ class Prover:
         lad = self.database.matchLine([A, D])
         lbc = self.database.matchLine([B, C])
 
-        found = False
-        for lines in self.database.paraFacts:
-            if lad in lines and lbc in lines:
-                found = True
-                break
-
-        if not found:
+        if not self.database.isPara(lad, lbc):
             return facts
 
-        for midp in self.database.midpFacts:
-            A_, B_ = sorted([A, B])
-            if [A_, B_] == midp[1:]:
-                M = midp[0]
-                C, D = sorted([C, D])
-                return [Fact("midp", [M, C, D])]
+        for M in self.database.midpoints(A, B):
+            C, D = sorted([C, D])
+            return [Fact("midp", [M, C, D])]
 
         return facts
 
@@ -699,10 +649,7 @@ class Prover:
         lac = self.database.matchLine([A, C])
         lbd = self.database.matchLine([B, D])
 
-        pac = self.database.lines[lac]
-        pbd = self.database.lines[lbd]
-
-        Os = [p for p in pac if p in pbd]
+        Os = self.database.lineIntersection(lac, lbd)
         for O in Os:
             if O == A or O == B:
                 continue
@@ -736,8 +683,7 @@ class Prover:
         M, A, B = predicate.points
         facts = []
         for midp in self.database.midpFacts:
-            A_, B_ = sorted([A, B])
-            if [M, A_, B_] != midp:
+            if (M, *sorted([A, B])) != midp:
                 N, C, D = midp
                 facts.append(
                     Fact("eqratio", [
@@ -837,24 +783,30 @@ class Prover:
         cUV = self.database.matchCong([U, V])
 
         facts = []
-        for ratios in self.database.eqratioFacts:
-            if Ratio(cPQ, cUV) not in ratios:
+        for ratio in self.database.equalRatios(Ratio(cPQ, cUV)):
+            if ratio == Ratio(cPQ, cUV):
                 continue
-            for ratio in ratios:
-                if ratio == Ratio(cPQ, cUV):
-                    continue
-                for sAB in self.database.congs[ratio.c1]:
-                    for sCD in self.database.congs[ratio.c2]:
-                        facts.append(Fact("cong", [sAB, sCD]))
+            for sAB in self.database.congs[ratio.c1]:
+                for sCD in self.database.congs[ratio.c2]:
+                    facts.append(Fact("cong", [sAB, sCD]))
         return facts
 
     def _ruleD75eqratio(self, predicate: Predicate):
         """
         eqratio(A,B,C,D,P,Q,U,V) & cong(P,Q,U,V) => cong(A,B,C,D)
+
+        The segments stand for their cong classes, so every segment of
+        the class of AB is cong to every segment of the class of CD.
         """
         A, B, C, D, P, Q, U, V = predicate.points
+        cAB = self.database.matchCong([A, B])
+        cCD = self.database.matchCong([C, D])
+        if cAB == cCD or not self.database.containsFact(
+                Fact("cong", [Segment(P, Q), Segment(U, V)])):
+            return []
+
         facts = []
-        for segments in self.database.congs.values():
-            if Segment(P, Q) in segments and Segment(U, V) in segments:
-                facts.append(Fact("cong", [Segment(A, B), Segment(C, D)]))
+        for sAB in self.database.congs[cAB]:
+            for sCD in self.database.congs[cCD]:
+                facts.append(Fact("cong", [sAB, sCD]))
         return facts
@@ -1,3 +1,4 @@
+import itertools
 from src.database import Database
 from src.predicate import Predicate
 from src.fact import Fact
@@ -9,6 +10,10 @@ class FC:
     One step forward chaining, deduct all the new facts
     that can be infered with the database, the predicate,
     and the rules
+
+    A para or perp predicate with lines fires the rules that only
+    depend on its two lines. Without lines, it fires the rules that
+    match on its points.
     """
 
     def __init__(self, database: Database):
@@ -22,9 +27,10 @@ class FC:
             facts += self._ruleD68(p)
             facts += self._ruleD69(p)
             facts += self._ruleD70(p)
-        if p.type == "para":
+        if p.type == "para" and p.lines:
             facts += self._ruleD40(p)
             facts += self._ruleD10para(p)
+        if p.type == "para" and not p.lines:
             facts += self._ruleD45para(p)
             facts += self._ruleD64(p)
             facts += self._ruleD65(p)
@@ -46,12 +52,13 @@ class FC:
             facts += self._ruleX4(p)
         if p.type == "cyclic":
             facts += self._ruleD41(p)
-        if p.type == "perp":
+        if p.type == "perp" and p.lines:
             facts += self._ruleD09(p)
             facts += self._ruleD10perp(p)
-            facts += self._ruleD52perp(p)
             facts += self._ruleX2(p)
             facts += self._ruleX3(p)
+        if p.type == "perp" and not p.lines:
+            facts += self._ruleD52perp(p)
         if p.type == "simtri":
             facts += self._ruleD59(p)
             facts += self._ruleD60(p)
@@ -67,12 +74,7 @@ class FC:
         """
         perp(A,B,C,D) & perp(P,Q,U,V) => eqangle(A,B,C,D,P,Q,U,V)
         """
-        if len(predicate.lines) == 2:
-            lAB, lCD = predicate.lines
-        else:
-            A, B, C, D = predicate.points
-            lAB = self.database.matchLine([A, B])
-            lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
         facts = []
         for [lPQ, lUV] in self.database.perpFacts:
             # print(lPQ, lUV, A, B, C, D)
@@ -90,9 +92,7 @@ class FC:
         """
         perp(A,B,C,D) => eqangle(A,B,C,D,C,D,A,B)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         return [Fact("eqangle", [lAB, lCD, lCD, lAB])]
 
@@ -111,15 +111,10 @@ class FC:
         """
         perp(A,B,C,D) & perp(C,D,E,F) => para(A,B,E,F)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         facts = []
-        for lines in self.database.perpFacts:
-            if lCD not in lines:
-                continue
-            lEF = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lEF in self.database.perpendicularLines(lCD):
             if lEF == lAB or lEF == lCD:
                 continue
             facts.append(Fact("para", [lAB, lEF]))
@@ -130,16 +125,11 @@ class FC:
         """
         para(A,B,C,D) & perp(C,D,E,F) => perp(A,B,E,F)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
 
         facts = []
         # find perp(lCD, ..) in perpfacts
-        for lines in self.database.perpFacts:
-            if lCD not in lines:
-                continue
-            lEF = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lEF in self.database.perpendicularLines(lCD):
             if lEF == lAB or lEF == lCD:
                 continue
             facts.append(Fact("perp", [lAB, lEF]))
@@ -150,16 +140,10 @@ class FC:
         """
         perp(C,D,E,F) & para(A,B,C,D) => perp(A,B,E,F)
         """
-        C, D, E, F = predicate.points
-        lCD = self.database.matchLine([C, D])
-        lEF = self.database.matchLine([E, F])
+        lCD, lEF = predicate.lines
 
         facts = []
-        # find para(lAB, lCD) in perpfacts
-        for lines in self.database.paraFacts:
-            if lCD not in lines:
-                continue
-            lAB = list(lines)[0] if list(lines)[1] == lCD else list(lines)[1]
+        for lAB in self.database.parallelLines(lCD):
             if lAB == lCD or lAB == lEF:
                 continue
             facts.append(Fact("perp", [lAB, lEF]))
@@ -242,16 +226,13 @@ class FC:
         """
         para(A,B,C,D) => eqangle(A,B,P,Q,C,D,P,Q)
         """
-        A, B, C, D = predicate.points
-        lAB = self.database.matchLine([A, B])
-        lCD = self.database.matchLine([C, D])
+        lAB, lCD = predicate.lines
         facts = []
         if lAB == lCD:
             return facts
         for lPQ in self.database.lines:
-            if lPQ in [lAB, lCD] or self.database.containsFact(
-                    Fact("para", [lPQ, lAB])) or self.database.containsFact(
-                        Fact("para", [lPQ, lCD])):
+            if lPQ in [lAB, lCD] or self.database.isPara(
+                    lPQ, lAB) or self.database.isPara(lPQ, lCD):
                 continue
             facts.append(Fact("eqangle", [lAB, lPQ, lCD, lPQ]))
         return facts
@@ -259,15 +240,21 @@ class FC:
     def _ruleD41(self, predicate: Predicate):
         """
         cyclic(A,B,P,Q) => eqangle(P,A,P,B,Q,A,Q,B)
+
+        Fired on the new sets of four points of the circle. Of the 24
+        orders of a set, those that only swap P and Q give the same fact.
         """
-        A, B, P, Q = predicate.points
-        lPA = self.database.matchLine([P, A])
-        lPB = self.database.matchLine([P, B])
-        lQA = self.database.matchLine([Q, A])
-        lQB = self.database.matchLine([Q, B])
-        if lPA != lPB and lQA != lQB:
-            return [Fact("eqangle", [lPA, lPB, lQA, lQB])]
-        return []
+        facts = []
+        for points in self.database.newConcyclicQuadruples(predicate.points):
+            for A, B in itertools.permutations(points, 2):
+                P, Q = [X for X in points if X not in [A, B]]
+                lPA = self.database.matchLine([P, A])
+                lPB = self.database.matchLine([P, B])
+                lQA = self.database.matchLine([Q, A])
+                lQB = self.database.matchLine([Q, B])
+                if lPA != lPB and lQA != lQB:
+                    facts.append(Fact("eqangle", [lPA, lPB, lQA, lQB]))
+        return facts
 
     def _ruleD42a(self, predicate: Predicate):
         """
@@ -299,27 +286,26 @@ class FC:
         """
         midp(E,A,B) & midp(F,A,C) => para(E,F,B,C)
         """
-        E, A1, B = predicate.points
+        E, A1, B1 = predicate.points
         facts = []
-        for midfact in self.database.midpFacts:
-            F, A2, C = midfact
-            if E == F:
-                continue
-
-            As = [p for p in [A1, B] if p in [A2, C]]
-            if len(As) != 1:
-                continue
+        if A1 == B1:
+            return facts
+        for A, B in [(A1, B1), (B1, A1)]:
+            for midfact in self.database.midpFactsAt(A):
+                F, A2, C = midfact
+                if E == F:
+                    continue
 
-            A = As[0]
-            B = B if A == A1 else A1
-            C = C if A == A2 else A2
-            if self.database.containsFact(Fact("coll", [A, B, C])):
-                continue
+                C = C if A == A2 else A2
+                if C in [A1, B1]:
+                    continue
+                if self.database.containsFact(Fact("coll", [A, B, C])):
+                    continue
 
-            lEF = self.database.matchLine([E, F])
-            lBC = self.database.matchLine([B, C])
+                lEF = self.database.matchLine([E, F])
+                lBC = self.database.matchLine([B, C])
 
-            facts.append(Fact("para", [lEF, lBC]))
+                facts.append(Fact("para", [lEF, lBC]))
 
         return facts
 
@@ -390,10 +376,8 @@ class FC:
         if B1 != B2 or A == C or A == B1:
             return facts
 
-        for midfact in self.database.midpFacts:
-            if sorted([A, C]) == midfact[1:]:
-                M = midfact[0]
-                facts.append(Fact("cong", [Segment(A, M), Segment(B1, M)]))
+        for M in self.database.midpoints(A, C):
+            facts.append(Fact("cong", [Segment(A, M), Segment(B1, M)]))
 
         return facts
 
@@ -541,9 +525,9 @@ class FC:
         simtri(A,B,C,P,Q,R) & cong(A,B,P,Q) => contri(A,B,C,P,Q,R)
         """
         A, B, C, P, Q, R = predicate.points
-        for _, segments in self.database.congs.items():
-            if Segment(A, B) in segments and Segment(P, Q) in segments:
-                return [Fact("contri", [Triangle(A, B, C), Triangle(P, Q, R)])]
+        if self.database.containsFact(
+                Fact("cong", [Segment(A, B), Segment(P, Q)])):
+            return [Fact("contri", [Triangle(A, B, C), Triangle(P, Q, R)])]
         return []
 
     def _ruleD62(self, predicate: Predicate):
@@ -560,12 +544,8 @@ class FC:
         M, A, B = predicate.points
 
         facts = []
-        for midp in self.database.midpFacts:
-            if midp[0] != M:
-                continue
-            A_, B_ = sorted([A, B])
-            if [M, A_, B_] != midp:
-                C, D = midp[1:]
+        for C, D in self.database.bisectedSegments(M):
+            if sorted([A, B]) != [C, D]:
                 lAC = self.database.matchLine([A, C])
                 lBD = self.database.matchLine([B, D])
                 facts.append(Fact("para", [lAC, lBD]))
@@ -581,21 +561,12 @@ class FC:
         lad = self.database.matchLine([A, D])
         lbc = self.database.matchLine([B, C])
 
-        found = False
-        for lines in self.database.paraFacts:
-            if lad in lines and lbc in lines:
-                found = True
-                break
-
-        if not found:
+        if not self.database.isPara(lad, lbc):
             return facts
 
-        for midp in self.database.midpFacts:
-            A_, B_ = sorted([A, B])
-            if [A_, B_] == midp[1:]:
-                M = midp[0]
-                C, D = sorted([C, D])
-                return [Fact("midp", [M, C, D])]
+        for M in self.database.midpoints(A, B):
+            C, D = sorted([C, D])
+            return [Fact("midp", [M, C, D])]
 
         return facts
 
@@ -608,10 +579,7 @@ class FC:
         lac = self.database.matchLine([A, C])
         lbd = self.database.matchLine([B, D])
 
-        pac = self.database.lines[lac]
-        pbd = self.database.lines[lbd]
-
-        Os = [p for p in pac if p in pbd]
+        Os = self.database.lineIntersection(lac, lbd)
         for O in Os:
             if O == A or O == B:
                 continue
@@ -645,8 +613,7 @@ class FC:
         M, A, B = predicate.points
         facts = []
         for midp in self.database.midpFacts:
-            A_, B_ = sorted([A, B])
-            if [M, A_, B_] != midp:
+            if (M, *sorted([A, B])) != midp:
                 N, C, D = midp
                 facts += [
                     Fact("eqratio", [
@@ -747,24 +714,30 @@ class FC:
         cUV = self.database.matchCong([U, V])
 
         facts = []
-        for ratios in self.database.eqratioFacts:
-            if Ratio(cPQ, cUV) not in ratios:
+        for ratio in self.database.equalRatios(Ratio(cPQ, cUV)):
+            if ratio == Ratio(cPQ, cUV):
                 continue
-            for ratio in ratios:
-                if ratio == Ratio(cPQ, cUV):
-                    continue
-                for sAB in self.database.congs[ratio.c1]:
-                    for sCD in self.database.congs[ratio.c2]:
-                        facts.append(Fact("cong", [sAB, sCD]))
+            for sAB in self.database.congs[ratio.c1]:
+                for sCD in self.database.congs[ratio.c2]:
+                    facts.append(Fact("cong", [sAB, sCD]))
         return facts
 
     def _ruleD75eqratio(self, predicate: Predicate):
         """
         eqratio(A,B,C,D,P,Q,U,V) & cong(P,Q,U,V) => cong(A,B,C,D)
+
+        The segments stand for their cong classes, so every segment of
+        the class of AB is cong to every segment of the class of CD.
         """
         A, B, C, D, P, Q, U, V = predicate.points
+        cAB = self.database.matchCong([A, B])
+        cCD = self.database.matchCong([C, D])
+        if cAB == cCD or not self.database.containsFact(
+                Fact("cong", [Segment(P, Q), Segment(U, V)])):
+            return []
+
         facts = []
-        for segments in self.database.congs.values():
-            if Segment(P, Q) in segments and Segment(U, V) in segments:
-                facts.append(Fact("cong", [Segment(A, B), Segment(C, D)]))
+        for sAB in self.database.congs[cAB]:
+            for sCD in self.database.congs[cCD]:
+                facts.append(Fact("cong", [sAB, sCD]))
         return facts
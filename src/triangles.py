@@ -0,0 +1,87 @@
+r"""
+triangles.py
+"""
+
+import itertools
+
+from src.primitives import Triangle
+
+
+class TriangleClasses:
+    """Classes of triangles under a vertex correspondence.
+
+    This is the store behind simtri and contri facts. A triangle is
+    looked up by its vertex set (`Triangle` hashes that way) and maps to
+    its class together with its vertices in the order of the class. In
+    that order, the k-th vertices of all members correspond to each
+    other. A merge keeps the oldest class and reorders the members of
+    the other one.
+
+    The symmetries of a single triangle are not tracked. A fact that
+    relates a triangle to itself in another order adds nothing.
+    """
+
+    def __init__(self) -> None:
+        self._ids = itertools.count()
+        self._class: dict[Triangle, int] = {}
+        self._order: dict[Triangle, tuple] = {}
+        self._members: dict[int, set[Triangle]] = {}
+
+    def add(self, t1: Triangle, t2: Triangle) -> None:
+        """Record that the k-th vertices of t1 and t2 correspond."""
+        c1, c2 = self._class.get(t1), self._class.get(t2)
+        if c1 is None and c2 is None:
+            cls = next(self._ids)
+            self._members[cls] = set()
+            for t in {t1, t2}:
+                self._put(cls, t, t.vertices)
+        elif c1 is None or c2 is None:
+            if c1 is None:
+                t1, t2, c1 = t2, t1, c2
+            # t2 lines up with t1 in the order of t1's class
+            order = [None] * 3
+            for p, v in zip(self._positions(t1), t2.vertices):
+                order[p] = v
+            self._put(c1, t2, tuple(order))
+        elif c1 != c2:
+            if c2 < c1:
+                t1, t2, c1, c2 = t2, t1, c2, c1
+            self._merge(c1, c2, self._positions(t1), self._positions(t2))
+
+    def same_class(self, t1: Triangle, t2: Triangle) -> bool:
+        """Whether t1 and t2 are in one class with the k-th vertices
+        corresponding."""
+        cls = self._class.get(t1)
+        if cls is None or cls != self._class.get(t2):
+            return False
+        return t1 == t2 or self._positions(t1) == self._positions(t2)
+
+    def classes(self) -> list[set[Triangle]]:
+        """The classes, oldest first, as triangles in class order."""
+        return [{Triangle(*self._order[t])
+                 for t in self._members[cls]}
+                for cls in sorted(self._members)]
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def _positions(self, t: Triangle) -> tuple[int, int, int]:
+        """Position of each vertex of t in the order of its class."""
+        order = self._order[t]
+        return tuple(order.index(v) for v in t.vertices)
+
+    def _put(self, cls: int, t: Triangle, order: tuple) -> None:
+        self._class[t] = cls
+        self._order[t] = order
+        self._members[cls].add(t)
+
+    def _merge(self, keep: int, drop: int, keep_pos: tuple,
+               drop_pos: tuple) -> None:
+        """Merge class drop into keep, where the vertex at drop_pos[k]
+        of drop corresponds to the one at keep_pos[k] of keep."""
+        for t in self._members.pop(drop):
+            old = self._order[t]
+            order = [None] * 3
+            for p, q in zip(keep_pos, drop_pos):
+                order[p] = old[q]
+            self._put(keep, t, tuple(order))
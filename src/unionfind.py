@@ -0,0 +1,48 @@
+r"""
+unionfind.py
+"""
+
+
+class UnionFind:
+    """Disjoint sets over hashable items.
+
+    `union(keep, drop)` always makes the root of `keep` the root of the
+    merged set, so callers decide which key survives a merge (the
+    database keeps the oldest line/cong name). `find` compresses paths,
+    which makes a sequence of operations close to constant time each.
+    """
+
+    def __init__(self) -> None:
+        self._parent: dict = {}
+
+    def add(self, item) -> None:
+        self._parent.setdefault(item, item)
+
+    def find(self, item):
+        """Root of item's set. Unknown items are their own root."""
+        parent = self._parent
+        root = parent.get(item, item)
+        if root == item:
+            return item
+        while True:
+            up = parent[root]
+            if up == root:
+                break
+            root = up
+        while item != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, keep, drop):
+        """Merge the set of drop into the set of keep, return the root."""
+        keep, drop = self.find(keep), self.find(drop)
+        self._parent.setdefault(keep, keep)
+        if keep != drop:
+            self._parent[drop] = keep
+        return keep
+
+    def same(self, a, b) -> bool:
+        return self.find(a) == self.find(b)
+
+    def __contains__(self, item) -> bool:
+        return item in self._parent
@@ -1,15 +1,81 @@
+import os
+from typing import Iterator
+
 from src.predicate import Predicate
 
 
 def parse_predicates_from_file(path_to_file: str) -> list[Predicate]:
-    predicates = []
     with open(path_to_file, "r", encoding="utf-8") as f:
-        for line in f.readlines():
-            predicate = Predicate.from_line(line)
-            predicates.append(predicate)
+        predicates, errors = Predicate.parse_lines(f)
+    if errors:
+        raise ValueError(f"Malformed lines in {path_to_file}: " +
+                         ", ".join(f"{n}: {line!r}" for n, line in errors))
     return predicates
 
 
+def iter_problems_from_file(
+    path_to_file: str,
+    buffer_size: int = 1 << 20,
+) -> Iterator[tuple[str, list[Predicate], list[Predicate]]]:
+    """Lazily yield (problem_id, hypotheses, goals) from a corpus file.
+
+    A corpus holds many problems, each introduced by a header line and
+    optionally followed by a `goals` line:
+
+        problem p1
+        coll(A,B,C).
+        para(A,B,D,E).
+        goals
+        para(D,E,A,B).
+        problem p2
+        ...
+
+    Every header yields a problem, even one with no predicates. A header
+    without an id raises ValueError. Blank lines and lines starting with
+    `#` are ignored. Predicates before the first header form a problem
+    named after the file, so a single-problem file such as `problems/p1`
+    is a valid corpus too.
+
+    The file is read line by line through a large buffer and only the
+    current problem is kept in memory. Malformed lines raise ValueError
+    when they are reached.
+    """
+    problem_id = os.path.basename(path_to_file)
+    hypotheses, goals = [], []
+    current = hypotheses
+    has_header = False
+
+    with open(path_to_file, "r", encoding="utf-8",
+              buffering=buffer_size) as f:
+        for lineno, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            if line.startswith("problem ") or line == "problem":
+                if has_header or hypotheses or goals:
+                    yield problem_id, hypotheses, goals
+                problem_id = line[len("problem"):].strip()
+                if not problem_id:
+                    raise ValueError(
+                        f"{path_to_file}:{lineno}: problem header without id")
+                hypotheses, goals = [], []
+                current = hypotheses
+                has_header = True
+            elif line == "goals":
+                current = goals
+            else:
+                try:
+                    current.append(Predicate.from_line(line))
+                except ValueError as e:
+                    raise ValueError(
+                        f"{path_to_file}:{lineno} ({problem_id}): {e}"
+                    ) from None
+
+    if has_header or hypotheses or goals:
+        yield problem_id, hypotheses, goals
+
+
 def deduplicate(a_list: list):
     res = []
     for e in a_list:
@@ -19,4 +85,4 @@ def deduplicate(a_list: list):
 
 
 if __name__ == "__main__":
-    print(parse_predicates_from_file("problems/p1"))
\ No newline at end of file
+    print(parse_predicates_from_file("problems/p1"))
@@ -0,0 +1,38 @@
+import pytest
+from src.agenda import Agenda
+from src.fact import Fact
+
+
+def test_01():
+    facts = [
+        Fact("eqangle", ["line1", "line2", "line3", "line4"]),
+        Fact("para", ["line2", "line1"]),
+        Fact("coll", ["A", "B", "C"]),
+        Fact("cong", ["AB", "CD"]),
+    ]
+    agenda = Agenda(facts)
+    assert len(agenda) == 4
+    assert list(agenda) == sorted(facts)
+
+    # an equal fact is already in the agenda
+    assert not agenda.push(Fact("para", ["line1", "line2"]))
+    assert Fact("para", ["line1", "line2"]) in agenda
+
+    popped = []
+    while agenda:
+        popped.append(agenda.pop())
+    assert popped == sorted(facts)
+    with pytest.raises(IndexError):
+        agenda.pop()
+
+
+def test_02():
+    a, b, c = [Fact("coll", [p, "X", "Y"]) for p in "ABC"]
+    agenda = Agenda([c, b, a])
+    agenda.discard(b)
+    assert b not in agenda and len(agenda) == 2
+
+    # b comes back once, however many heap entries it has
+    assert agenda.push(b)
+    assert [agenda.pop() for _ in range(3)] == [a, b, c]
+    assert not agenda
@@ -123,3 +123,451 @@ def test_p9():
     s += "\n".join(str(p) for p in predicates)
     s += "\n" + str(db)
     print(s)
+
+
+def test_p10():
+    from src.unionfind import UnionFind
+    uf = UnionFind()
+    for item in "abcd":
+        uf.add(item)
+
+    assert uf.union("b", "c") == "b"
+    assert uf.union("a", "c") == "a"
+    assert uf.find("c") == "a" and uf.same("b", "c")
+    assert not uf.same("a", "d")
+    assert "d" in uf and "e" not in uf
+    assert uf.find("e") == "e"
+
+
+def test_p11():
+    # three lines through pairs of A, B, C merge in one step
+    db = Database()
+    lAB = db.matchLine(["A", "B"])
+    lBC = db.matchLine(["B", "C"])
+    lAC = db.matchLine(["A", "C"])
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+
+    assert db.lines == {lAB: ["A", "B", "C"]}
+    assert db.findLine(lBC) == db.findLine(lAC) == lAB
+    assert db.matchLine(["C", "B"]) == lAB
+    assert db.lineIntersection(lBC, lAC) == ["A", "B", "C"]
+
+
+def test_p12():
+    # the merged line picks up X and C, which already had their own line
+    db = Database()
+    db.addFact(Fact("coll", ["A", "B", "X"]))
+    lXC = db.matchLine(["X", "C"])
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+
+    assert db.lines == {"line1": ["A", "B", "C", "X"]}
+    assert db.findLine(lXC) == "line1"
+    assert db.containsFact(Fact("coll", ["X", "C", "A"]))
+
+
+def test_p13():
+    # stored facts keep merged keys and are resolved at query time
+    db = Database()
+    lAB = db.matchLine(["A", "B"])
+    lBC = db.matchLine(["B", "C"])
+    lDE = db.matchLine(["D", "E"])
+    db.addFact(Fact("para", [lBC, lDE]))
+    db.addFact(Fact("eqangle", [lBC, lDE, lDE, lAB]))
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+
+    assert db.paraFacts == [{lAB, lDE}]
+    assert db.containsFact(Fact("para", [lAB, lDE]))
+    assert db.containsFact(Fact("eqangle", [lAB, lDE, lDE, lBC]))
+
+
+def test_p14():
+    # a merged key is never handed out again for a new line
+    db = Database()
+    lAB = db.matchLine(["A", "B"])
+    lBC = db.matchLine(["B", "C"])
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+    lPQ = db.matchLine(["P", "Q"])
+
+    assert lPQ not in (lAB, lBC)
+    assert db.matchLine(["P", "Q"]) == lPQ
+    assert db.matchLine(["A", "C"]) == lAB
+
+
+def test_p15():
+    from src.primitives import Segment, Ratio
+    db = Database()
+    cAB = db.matchCong(["A", "B"])
+    cCD = db.matchCong(["C", "D"])
+    cEF = db.matchCong(["E", "F"])
+    cPQ = db.matchCong(["P", "Q"])
+    db.addFact(Fact("eqratio", [
+        Segment("A", "B"), Segment("P", "Q"),
+        Segment("C", "D"), Segment("P", "Q")
+    ]))
+    db.addFact(Fact("cong", [Segment("A", "B"), Segment("E", "F")]))
+    db.addFact(Fact("cong", [Segment("C", "D"), Segment("F", "E")]))
+
+    assert list(db.congs) == [cAB, cPQ]
+    assert db.findCong(cCD) == db.findCong(cEF) == cAB
+    assert db.findSegment(Segment("D", "C")) == cAB
+    assert db.findSegment(Segment("X", "Y")) is None
+    assert db.matchCong(["F", "E"]) == cAB
+    assert db.containsFact(
+        Fact("cong", [Segment("B", "A"), Segment("C", "D")]))
+    # the stored ratios collapse to one and no longer count as a fact
+    assert db.eqratioFacts == []
+    assert db.equalRatios(Ratio(cAB, cPQ)) == set()
+
+
+def test_p16():
+    db = Database()
+    l1, l2, l3, l4, l5 = (db.matchLine([p, q])
+                          for p, q in ["AB", "CD", "EF", "GH", "AX"])
+    db.addFact(Fact("para", [l1, l2]))
+    db.addFact(Fact("para", [l3, l4]))
+    assert db.paraFacts == [{l1, l2}, {l3, l4}]
+    assert not db.containsFact(Fact("para", [l1, l3]))
+
+    # a third para fact joins both classes
+    db.addFact(Fact("para", [l2, l4]))
+    assert db.paraFacts == [{l1, l2, l3, l4}]
+    assert db.isPara(l1, l3) and db.parallelLines(l3) == {l1, l2, l3, l4}
+
+    # merging l5 into l1 makes it parallel to the class as well
+    db.addFact(Fact("coll", ["A", "B", "X"]))
+    assert db.findLine(l5) == l1 and db.isPara(l5, l4)
+    assert db.parallelLines(l5) == {l1, l2, l3, l4}
+    assert db.parallelLines(db.matchLine(["P", "Q"])) == set()
+
+
+def test_p17():
+    db = Database()
+    l1, l2, l3, l4 = (db.matchLine([p, q])
+                      for p, q in ["AB", "CD", "EF", "GH"])
+    db.addFact(Fact("perp", [l1, l2]))
+    assert db.isPerp(l2, l1) and not db.isPerp(l1, l3)
+    assert db.perpFacts == [{l1, l2}]
+
+    # perpendicularity follows the direction classes
+    db.addFact(Fact("para", [l2, l3]))
+    assert db.containsFact(Fact("perp", [l3, l1]))
+    assert db.perpendicularLines(l1) == {l2, l3}
+    db.addFact(Fact("para", [l4, l1]))
+    assert db.perpendicularLines(l3) == {l1, l4}
+    assert len(db.perpFacts) == 4
+
+
+def test_p18():
+    from src.primitives import Angle
+    db = Database()
+    l1, l2, l3, l4, l5, l6 = (db.matchLine([p, q])
+                              for p, q in ["AB", "CD", "EF", "GH", "IJ", "BX"])
+    db.addFact(Fact("eqangle", [l1, l2, l3, l4]))
+    db.addFact(Fact("eqangle", [l5, l6, l3, l2]))
+    assert len(db.eqangleFacts) == 2
+    assert db.containsFact(Fact("eqangle", [l3, l4, l1, l2]))
+    assert not db.containsFact(Fact("eqangle", [l1, l2, l5, l6]))
+
+    # an angle shared by both classes merges them
+    db.addFact(Fact("eqangle", [l3, l4, l3, l2]))
+    assert db.eqangleFacts == [{
+        Angle(l1, l2), Angle(l3, l4), Angle(l5, l6), Angle(l3, l2)
+    }]
+
+    # line merges re-key the stored angles
+    db.addFact(Fact("coll", ["A", "B", "X"]))
+    assert Angle(l5, l1) in db.eqangleFacts[0]
+    assert db.angleClass(Angle(l5, l6)) == db.angleClass(Angle(l1, l2)) == 0
+    assert db.angleClass(Angle(l1, l5)) is None
+
+
+def test_p19():
+    # a line merge that makes two classes share an angle merges them
+    db = Database()
+    l1, l2, l3, l4, l5, l6, l7 = (
+        db.matchLine([p, q])
+        for p, q in ["AB", "CD", "EF", "GH", "BX", "IJ", "KL"])
+    db.addFact(Fact("eqangle", [l1, l2, l3, l4]))
+    db.addFact(Fact("eqangle", [l5, l2, l6, l7]))
+    assert len(db.eqangleFacts) == 2
+
+    db.addFact(Fact("coll", ["A", "B", "X"]))
+    assert len(db.eqangleFacts) == 1
+    assert db.containsFact(Fact("eqangle", [l3, l4, l6, l7]))
+
+
+def test_p20():
+    from src.primitives import Segment, Ratio
+    db = Database()
+    cAB, cCD, cEF, cGH, cPQ, cUV = (db.matchCong([p, q]) for p, q in
+                                    ["AB", "CD", "EF", "GH", "PQ", "UV"])
+    db.addFact(Fact("eqratio", [
+        Segment("A", "B"), Segment("C", "D"),
+        Segment("P", "Q"), Segment("U", "V")
+    ]))
+    db.addFact(Fact("eqratio", [
+        Segment("E", "F"), Segment("G", "H"),
+        Segment("P", "Q"), Segment("G", "H")
+    ]))
+    assert len(db.eqratioFacts) == 2
+    assert not db.containsFact(Fact("eqratio", [
+        Segment("A", "B"), Segment("C", "D"),
+        Segment("E", "F"), Segment("G", "H")
+    ]))
+
+    # UV = GH makes PQ/UV and PQ/GH the same ratio, joining the classes
+    db.addFact(Fact("cong", [Segment("U", "V"), Segment("G", "H")]))
+    assert db.eqratioFacts == [{
+        Ratio(cAB, cCD), Ratio(cPQ, cGH), Ratio(cEF, cGH)
+    }]
+    assert db.ratioClass(Ratio(cPQ, cUV)) == 0
+    assert db.containsFact(Fact("eqratio", [
+        Segment("A", "B"), Segment("C", "D"),
+        Segment("E", "F"), Segment("G", "H")
+    ]))
+    assert db.equalRatios(Ratio(cCD, cAB)) == set()
+
+
+def test_p21():
+    from src.primitives import Triangle
+    from src.triangles import TriangleClasses
+    T = Triangle
+    tris = TriangleClasses()
+    tris.add(T("A", "B", "C"), T("P", "Q", "R"))
+    tris.add(T("X", "Z", "Y"), T("U", "W", "V"))
+    assert len(tris) == 2
+    assert tris.same_class(T("B", "C", "A"), T("Q", "R", "P"))
+    assert not tris.same_class(T("A", "B", "C"), T("Q", "P", "R"))
+    assert not tris.same_class(T("A", "B", "C"), T("X", "Y", "Z"))
+
+    # joins the classes with B~Y, C~X, A~Z
+    tris.add(T("C", "A", "B"), T("X", "Z", "Y"))
+    assert len(tris) == 1
+    assert tris.same_class(T("P", "Q", "R"), T("Z", "Y", "X"))
+    assert tris.same_class(T("U", "W", "V"), T("R", "P", "Q"))
+    assert not tris.same_class(T("P", "Q", "R"), T("X", "Y", "Z"))
+    assert tris.classes() == [{
+        T("A", "B", "C"), T("P", "Q", "R"), T("Z", "Y", "X"),
+        T("W", "V", "U")
+    }]
+    assert [t.vertices for t in sorted(tris.classes()[0])] == [
+        ("A", "B", "C"), ("P", "Q", "R"), ("W", "V", "U"), ("Z", "Y", "X")
+    ]
+
+    db = Database()
+    db.addFact(Fact("simtri", [T("A", "B", "C"), T("P", "Q", "R")]))
+    db.addFact(Fact("simtri", [T("R", "Q", "P"), T("F", "E", "D")]))
+    assert db.containsFact(
+        Fact("simtri", [T("B", "A", "C"), T("E", "D", "F")]))
+    assert not db.containsFact(
+        Fact("simtri", [T("A", "B", "C"), T("E", "F", "D")]))
+    assert db.contriFacts == []
+
+
+def test_p22():
+    from src.primitives import Circle
+    db = Database()
+    db.addFact(Fact("circle", ["O", "A", "B"]))
+    # used to hang on the circle around O
+    db.addFact(Fact("circle", ["P", "A", "C"]))
+    db.addFact(Fact("circle", ["P", "C", "D"]))
+    assert db.circles == [
+        Circle("O", {"A", "B"}),
+        Circle("P", {"A", "C", "D"}),
+    ]
+
+    db.addFact(Fact("cyclic", ["E", "F", "G", "H"]))
+    db.addFact(Fact("cyclic", ["X", "Y", "Z", "W"]))
+    assert not db.containsFact(Fact("cyclic", ["E", "F", "X", "Y"]))
+    # meets both cyclic circles in three points
+    db.addFact(Fact("cyclic", ["E", "F", "G", "X", "Y", "Z"]))
+    assert [c.center for c in db.circles] == ["O", "P", "O1"]
+    assert db.containsFact(Fact("cyclic", ["H", "W", "E", "Z"]))
+    assert not db.containsFact(Fact("cyclic", ["H", "W", "E", "A"]))
+
+    db.addFact(Fact("cyclic", ["A", "C", "E", "F", "G"]))
+    assert len(db.circles) == 3
+    # the merged circle picks up three points of the circle around P
+    db.addFact(Fact("cyclic", ["D", "E", "X", "Y"]))
+    assert db.circles[1] == Circle(
+        "P", {"A", "C", "D", "E", "F", "G", "H", "W", "X", "Y", "Z"})
+    assert len(db.circles) == 2
+    assert db.containsFact(Fact("circle", ["P", "D", "W"]))
+    assert not db.containsFact(Fact("circle", ["O", "D"]))
+    assert db.newCenterName == "O3"
+
+
+def test_p23():
+    db = Database()
+    db.addFact(Fact("midp", ["M", "B", "A"]))
+    db.addFact(Fact("midp", ["M", "C", "D"]))
+    db.addFact(Fact("midp", ["N", "A", "C"]))
+    db.addFact(Fact("midp", ["M", "A", "B"]))
+    assert db.midpFacts == [("M", "A", "B"), ("M", "C", "D"),
+                            ("N", "A", "C")]
+    assert db.midpoints("B", "A") == ["M"]
+    assert db.midpoints("A", "D") == []
+    assert db.bisectedSegments("M") == [("A", "B"), ("C", "D")]
+    assert db.midpFactsAt("A") == [("M", "A", "B"), ("N", "A", "C")]
+    assert db.containsFact(Fact("midp", ["N", "C", "A"]))
+    assert not db.containsFact(Fact("midp", ["N", "A", "B"]))
+
+
+def test_p24():
+    from src.primitives import Segment
+    # 100 points on a row, far more names than there used to be
+    db = Database(lines={"line2": ["A", "B"]})
+    points = [f"P{i}" for i in range(100)]
+    names = [db.matchLine([p, q]) for p, q in zip(points, points[1:])]
+    assert names[:2] == ["line1", "line3"]
+    assert len(set(names)) == 99
+    congs = [
+        db.matchCong([p, q]) for p, q in zip(points, points[1:])
+    ]
+    assert congs[-1] == "cong99"
+    db.addFact(Fact("cong", [Segment("P0", "P1"), Segment("P1", "P2")]))
+    assert db.newCongName == "cong100"
+
+
+def test_p25():
+    db = Database()
+    lAB = db.matchLine(["A", "B"])
+    lCD = db.matchLine(["C", "D"])
+    lEF = db.matchLine(["E", "F"])
+    assert db.lineIntersection(lAB, lCD) == []
+    assert db.lineIntersection(lCD, lEF) == []
+    assert (lAB, lCD) in db._intersections
+
+    # lCD gains a point, the negative entries go
+    db.addFact(Fact("coll", ["C", "D", "A"]))
+    assert db.lineIntersection(lCD, lAB) == ["A"]
+    assert db.linesThrough("A") == {lAB, lCD}
+
+    # lEF is merged into lCD
+    db.addFact(Fact("coll", ["C", "D", "E", "F"]))
+    assert db.lineIntersection(lAB, lEF) == ["A"]
+    assert db.linesThrough("F") == {lCD}
+    assert db.linesThrough("X") == set()
+    assert db.containsFact(Fact("coll", ["F"]))
+    assert db.matchLine(["B", "B"]) == lAB
+
+
+def test_p26():
+    from src.primitives import Segment
+    db = Database()
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+    db.addFact(Fact("cong", [Segment("A", "B"), Segment("C", "D")]))
+    coll = Fact("coll", ["A", "C", "D"])
+    cong = Fact("cong", [Segment("A", "B"), Segment("E", "F")])
+
+    def counts():
+        info = db.containsFactInfo()
+        return info["hits"], info["misses"]
+
+    hits, misses = counts()
+    assert not db.containsFact(coll)
+    assert not db.containsFact(cong)
+    assert not db.containsFact(coll)
+    assert counts() == (hits + 1, misses + 2)
+
+    # a cong change leaves the coll answer in place
+    db.addFact(Fact("cong", [Segment("C", "D"), Segment("E", "F")]))
+    hits, misses = counts()
+    assert not db.containsFact(coll)
+    assert db.containsFact(cong)
+    assert counts() == (hits + 1, misses + 1)
+
+    db.addFact(Fact("coll", ["B", "C", "D"]))
+    hits, misses = counts()
+    assert db.containsFact(coll)
+    assert counts() == (hits, misses + 1)
+
+
+def test_p27():
+    import types
+    from src.primitives import Segment
+    db = Database()
+    # AB/CD = CD/EF: two of the four swapped forms repeat the others
+    fact = Fact("eqratio", [Segment("A", "B"), Segment("C", "D"),
+                            Segment("C", "D"), Segment("E", "F")])
+    db.addFact(fact)
+    info = db.predicateFormsInfo()
+    forms = db._predicate_all_forms(fact)
+    assert isinstance(forms, types.GeneratorType)
+    forms = list(forms)
+    assert len(forms) == len(set(forms)) == 2
+    assert db.predicateFormsInfo() == {
+        "yielded": info["yielded"] + 2,
+        "skipped": info["skipped"] + 2,
+    }
+
+    with pytest.raises(ValueError):
+        next(db._predicate_all_forms(Fact("foo", ["A"])))
+
+
+def test_p28():
+    db = Database()
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+    db.addFact(Fact("coll", ["C", "D", "E"]))
+    db.addFact(Fact("coll", ["F", "G", "H"]))
+    perp = Fact("perp", ["line1", "line2"])
+    para = Fact("para", ["line1", "line3"])
+    db.addFact(perp)
+    db.addFact(para)
+
+    # perp fires once per line order, and at its foot C
+    forms = list(db._predicate_all_forms(perp))
+    assert [p.lines for p in forms if p.lines] == [("line1", "line2"),
+                                                    ("line2", "line1")]
+    points = {p.points for p in forms if not p.lines}
+    assert len(points) == 8
+    assert all(B1 == B2 == "C" for _, B1, B2, _ in points)
+
+    # para gives every point quadruple, but one line form
+    forms = list(db._predicate_all_forms(para))
+    assert [p.lines for p in forms if p.lines] == [("line1", "line3")]
+    assert len([p for p in forms if not p.lines]) == 36
+
+
+def test_p29():
+    from src.primitives import Segment
+    db = Database()
+    db.addFact(Fact("cong", [Segment("A", "B"), Segment("C", "D")]))
+    db.addFact(Fact("cong", [Segment("A", "B"), Segment("E", "F")]))
+    db.addFact(Fact("cong", [Segment("P", "Q"), Segment("R", "S")]))
+    fact = Fact("eqratio", [Segment("C", "D"), Segment("R", "S"),
+                            Segment("U", "V"), Segment("X", "Y")])
+    db.addFact(fact)
+
+    # one form per ratio ordering, not per choice of segments
+    forms = list(db._predicate_all_forms(fact))
+    assert [p.points for p in forms] == [
+        ("A", "B", "P", "Q", "U", "V", "X", "Y"),
+        ("P", "Q", "A", "B", "X", "Y", "U", "V"),
+        ("A", "B", "U", "V", "P", "Q", "X", "Y"),
+        ("U", "V", "A", "B", "X", "Y", "P", "Q"),
+    ]
+
+
+def test_p30():
+    db = Database()
+    db.addFact(Fact("cyclic", ["A", "B", "C", "D"]))
+    assert db.newConcyclicQuadruples(["A", "B", "C", "D"]) == [
+        ("A", "B", "C", "D")
+    ]
+    assert db.newConcyclicQuadruples(["A", "B", "C", "D"]) == []
+
+    # E is new on the circle, and only the sets with E come up
+    assert db.newConcyclicQuadruples(["A", "B", "C", "E"]) == [
+        ("A", "B", "C", "E"),
+        ("A", "B", "D", "E"),
+        ("A", "C", "D", "E"),
+        ("B", "C", "D", "E"),
+    ]
+    db.addFact(Fact("cyclic", ["A", "B", "C", "E"]))
+    assert db.newConcyclicQuadruples(["B", "C", "D", "E"]) == []
+
+    # points on no circle yet are returned as they are
+    assert db.newConcyclicQuadruples(["P", "Q", "R", "S"]) == [
+        ("P", "Q", "R", "S")
+    ]
@@ -33,4 +33,63 @@ def test_03():
     f4 = Fact("cyclic", ['A', 'E', 'F', 'H'])
     f5 = Fact("cyclic", ['B', 'C', 'E', 'F'])
 
-    print(sorted((set([f1, f2, f3, f4, f5]))))
\ No newline at end of file
+    print(sorted((set([f1, f2, f3, f4, f5]))))
+
+def test_04():
+    from src.primitives import Triangle
+    f1 = Fact("eqangle", ["line1", "line2", "line3", "line4"])
+    f2 = Fact("eqangle", ["line3", "line4", "line1", "line2"])
+    f3 = Fact("simtri", [Triangle("A", "B", "C"), Triangle("P", "Q", "R")])
+    f4 = Fact("simtri", [Triangle("P", "Q", "R"), Triangle("A", "B", "C")])
+    f5 = Fact("simtri", [Triangle("A", "C", "B"), Triangle("P", "Q", "R")])
+
+    assert f1 == f2 and hash(f1) == hash(f2)
+    assert f3 == f4
+    assert f3 != f5
+    assert len({f1, f2, f3, f4, f5}) == 3
+
+
+def test_05():
+    f1 = Fact("perp", ["line1", "line2"])
+    f2 = Fact("coll", ["C", "D", "E"])
+    f3 = Fact("coll", ["A", "B", "C"])
+    f4 = Fact("midp", ["M", "B", "A"])
+
+    assert sorted([f1, f2, f3, f4]) == [f3, f2, f4, f1]
+
+
+def test_06():
+    import copy
+    f1 = Fact("para", ["line2", "line1"])
+    f2 = Fact("para", ["line1", "line2"])
+
+    assert f1 is f2
+    assert f2.objects == ("line2", "line1")
+    assert copy.deepcopy(f1) is f1
+    assert Fact("midp", ["M", "B", "A"]) is Fact("midp", ["M", "A", "B"])
+
+
+def test_07():
+    from src.primitives import Segment
+    f1 = Fact("coll", ["A", "B", "C"])
+    f2 = Fact("coll", ["A", "B"])
+    f3 = Fact("cong", [Segment("A1", "B"), Segment("C", "D")])
+    f4 = Fact("cong", [Segment("A", "B"), Segment("C", "D")])
+
+    # Facts sort by their key tuples: a prefix comes first and point
+    # names are compared whole, unlike the old string order
+    assert sorted([f1, f2]) == [f2, f1]
+    assert sorted([f3, f4]) == [f4, f3]
+
+
+def test_08():
+    import copy
+    import pickle
+    from src.primitives import Segment, Triangle
+    f1 = Fact("cong", [Segment("A", "B"), Segment("C", "D")])
+    f2 = Fact("simtri", [Triangle("A", "B", "C"), Triangle("P", "Q", "R")])
+
+    for fact in (f1, f2):
+        assert copy.copy(fact) is fact
+        assert copy.deepcopy(fact) is fact
+        assert pickle.loads(pickle.dumps(fact)) is fact
@@ -0,0 +1,68 @@
+"""
+incidence.py testing module
+"""
+
+import pytest
+from src.database import Database
+from src.fact import Fact
+from src.incidence import IncidenceView
+from src.primitives import Segment
+
+np = pytest.importorskip("numpy")
+
+
+def _database():
+    db = Database()
+    db.addFact(Fact("coll", ["A", "B", "C"]))
+    db.addFact(Fact("coll", ["C", "D", "E"]))
+    db.addFact(Fact("coll", ["A", "D", "F"]))
+    db.addFact(Fact("cyclic", ["A", "B", "D", "E"]))
+    return db
+
+
+def test_01():
+    db = _database()
+    view = IncidenceView(db)
+    incidence = view.point_line()
+
+    assert view.points == ["A", "B", "C", "D", "E", "F"]
+    assert incidence.shape == (6, 3)
+    assert incidence[:, 0].tolist() == [1, 1, 1, 0, 0, 0]
+    assert view.point_circle()[:, 0].tolist() == [1, 1, 0, 1, 1, 0]
+    assert view.point_line() is incidence
+
+    db.addFact(Fact("coll", ["A", "B", "G"]))
+    incidence = view.point_line()
+    assert incidence.shape == (7, 3)
+    assert incidence[6].tolist() == [1, 0, 0]
+
+
+def test_02():
+    db = _database()
+    view = IncidenceView(db)
+    lABC, lCDE, lADF = view.line_keys
+
+    assert view.line_intersections() == {
+        (lABC, lCDE): "C",
+        (lABC, lADF): "A",
+        (lCDE, lADF): "D",
+    }
+    assert view.collinear_triples() == {("A", "B", "C"), ("C", "D", "E"),
+                                        ("A", "D", "F")}
+
+
+def test_03():
+    db = _database()
+    lABC, lCDE, lADF = db.lines
+    db.addFact(Fact("para", [lABC, lADF]))
+    db.addFact(Fact("cong", [Segment("A", "B"), Segment("C", "D")]))
+    db.addFact(Fact("cong", [Segment("E", "F"), Segment("D", "F")]))
+    view = IncidenceView(db)
+
+    assert view.line_directions().tolist() == [0, 1, 0]
+    segments, labels = view.segment_congs()
+    assert segments == [
+        Segment("A", "B"), Segment("C", "D"),
+        Segment("D", "F"), Segment("E", "F")
+    ]
+    assert labels.tolist() == [0, 0, 1, 1]
@@ -67,7 +67,7 @@ def test_01():
     assert len(db.eqangleFacts) == 7
     assert len(db.simtriFacts) == 8
     assert len(db.circles) == 6
-    assert len(increased_facts) == 47
+    assert len(increased_facts) == 49
 
 
 def test_02():
@@ -200,4 +200,4 @@ def test_02():
     assert len(db.eqangleFacts) == 24
     assert len(db.simtriFacts) == 6
     assert len(db.circles) == 0
-    assert len(increased_facts) >= 91
+    assert len(increased_facts) == 90
@@ -13,4 +13,38 @@ def test_01():
     assert p2 not in [p1]
     assert p1 in [p2, p3]
     assert p1 in [p3]
-    assert p1 in [p1]
\ No newline at end of file
+    assert p1 in [p1]
+
+def test_02():
+    p = Predicate.from_line("  coll(A,  B,C)    .")
+
+    assert p == Predicate("coll", ["A", "B", "C"])
+    assert p.points == ("A", "B", "C")
+    assert hash(p) == hash(Predicate("coll", ("A", "B", "C")))
+    with pytest.raises(AttributeError):
+        p.points = ("A", "B")
+    with pytest.raises(ValueError):
+        Predicate.from_line("coll(A,,B)")
+
+
+def test_03():
+    predicates, errors = Predicate.parse_lines(
+        ["coll(A,B,C).\n", "\n", "para A,B,C,D\n", "midp(M,A,B)"])
+
+    assert predicates == [
+        Predicate("coll", ["A", "B", "C"]),
+        Predicate("midp", ["M", "A", "B"])
+    ]
+    assert errors == [(3, "para A,B,C,D")]
+
+
+def test_04():
+    import copy
+    import pickle
+    p = Predicate("coll", ["A", "B", "C"])
+
+    with pytest.raises(AttributeError):
+        del p.type
+    for clone in (copy.copy(p), copy.deepcopy(p),
+                  pickle.loads(pickle.dumps(p))):
+        assert clone == p and hash(clone) == hash(p)
@@ -1,4 +1,4 @@
-from src.primitives import Triangle, Segment, Ratio
+from src.primitives import Triangle, Segment, Ratio, Angle, Circle, SymbolTable
 import pytest
 
 
@@ -27,4 +27,71 @@ def test_03():
     r2 = Ratio("cong1", "cong2")
 
     assert r1 == r2
-    assert r1 in [r2]
\ No newline at end of file
+    assert r1 in [r2]
+
+def test_04():
+    table = SymbolTable()
+    a = table.intern("A")
+    b = table.intern("B")
+
+    assert (a, b) == (0, 1)
+    assert table.intern("A") == a
+    assert table.lookup("C") is None
+    assert table.symbol(b) == "B"
+    assert table.pair("B", "A") == table.pair("A", "B") == (a, b)
+    assert "A" in table and "C" not in table
+    assert len(table) == 2
+
+
+def test_05():
+    a = Angle("line1", "line2")
+    s = Segment("B", "A")
+
+    with pytest.raises(AttributeError):
+        a.lk1 = "line3"
+    with pytest.raises(AttributeError):
+        s.p1 = "C"
+
+    assert a.reindex({"line2": "line3"}) == Angle("line1", "line3")
+    assert a.reindex({"line4": "line3"}) == a
+    assert Ratio("cong1", "cong2").reindex({"cong2": "cong1"}) == Ratio(
+        "cong1", "cong1")
+
+
+def test_06():
+    c1 = Circle("O", {"A", "B", "C"})
+    c2 = Circle("O", ["C", "B", "A"])
+
+    assert c1 == c2
+    assert len({c1, c2}) == 1
+    assert Triangle("A", "B", "C") < Triangle("A", "C", "B")
+
+
+def test_07():
+    import copy
+    import pickle
+    objects = [
+        Angle("line1", "line2"),
+        Segment("B", "A"),
+        Ratio("cong1", "cong2"),
+        Triangle("A", "C", "B"),
+        Circle("O", {"A", "B", "C"}),
+    ]
+
+    for obj in objects:
+        for clone in (copy.copy(obj), copy.deepcopy(obj),
+                      pickle.loads(pickle.dumps(obj))):
+            assert clone == obj and hash(clone) == hash(obj)
+    assert copy.deepcopy(Triangle("A", "C", "B")).vertices == ("A", "C", "B")
+
+
+def test_08():
+    table = SymbolTable()
+    mask = table.mask(["C", "A", "B", "A"])
+
+    assert mask == 0b111
+    assert table.ids(mask) == [0, 1, 2]
+    assert table.lookup_mask(["B", "A"]) == 0b110
+    assert table.lookup_mask(["A", "X"]) is None
+    assert table.mask(["D"]) == 0b1000 and len(table) == 4
+    assert table.ids(0) == []
@@ -0,0 +1,56 @@
+import pytest
+from src.predicate import Predicate
+from src.util import iter_problems_from_file
+
+
+def test_01(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.write_text("# generated\n"
+                      "problem p1\n"
+                      "coll(A,B,C).\n"
+                      "para(A,B,D,E).\n"
+                      "goals\n"
+                      "para(D,E,B,C).\n"
+                      "\n"
+                      "problem p2\n"
+                      "midp(M,A,B).\n")
+
+    problems = iter_problems_from_file(str(corpus))
+    assert next(problems) == ("p1", [
+        Predicate("coll", ["A", "B", "C"]),
+        Predicate("para", ["A", "B", "D", "E"])
+    ], [Predicate("para", ["D", "E", "B", "C"])])
+    assert next(problems) == ("p2", [Predicate("midp", ["M", "A", "B"])],
+                              [])
+    assert next(problems, None) is None
+
+
+def test_02(tmp_path):
+    single = tmp_path / "p1"
+    single.write_text("coll(A,B,C).\npara(A,B,D,E).")
+
+    problems = list(iter_problems_from_file(str(single)))
+    assert [(pid, len(h), len(g)) for pid, h, g in problems] == [("p1", 2, 0)]
+
+
+def test_03(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.write_text("problem p1\ncoll(A,B,C).\nproblem p2\ncoll A,B\n")
+
+    problems = iter_problems_from_file(str(corpus))
+    assert next(problems)[0] == "p1"
+    with pytest.raises(ValueError, match=":4 \\(p2\\)"):
+        next(problems)
+
+
+def test_04(tmp_path):
+    corpus = tmp_path / "corpus"
+    corpus.write_text("problem p1\nproblem p2\ncoll(A,B,C).\nproblem p3\n")
+
+    problems = list(iter_problems_from_file(str(corpus)))
+    assert [(pid, len(h), len(g)) for pid, h, g in problems] == [
+        ("p1", 0, 0), ("p2", 1, 0), ("p3", 0, 0)]
+
+    corpus.write_text("problem p1\ncoll(A,B,C).\nproblem\n")
+    with pytest.raises(ValueError, match=":3: problem header without id"):
+        list(iter_problems_from_file(str(corpus)))